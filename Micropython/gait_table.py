@@ -0,0 +1,94 @@
+# gait frame table player
+# plays servo angle tables compiled by Python_sim/gait_compiler.py
+# no trig and no allocation per tick - just table lookups
+
+import struct
+import utime
+
+MAGIC = b'QGAT'
+VERSION = 1
+HEADER = '<4sBBHI'   # magic, version, servos, tick ms, frames
+HEADER_SIZE = 12
+
+
+class GaitTable:
+    def __init__(self, frames, tick_ms, servos=8, period_ms=0):
+        self.frames = frames      # bytearray of angles, one frame after the other
+        self.tick_ms = tick_ms
+        self.servos = servos
+        self.n_frames = len(frames) // servos
+        self.period_ms = period_ms  # oscillator tables: the frames span one period, 0 otherwise
+
+    @classmethod
+    def load(cls, path):
+        """read a .qgt file into one preallocated buffer"""
+        with open(path, 'rb') as f:
+            magic, version, servos, tick_ms, n = struct.unpack(HEADER, f.read(HEADER_SIZE))
+            if magic != MAGIC or version != VERSION:
+                raise ValueError('not a gait table: ' + path)
+            frames = bytearray(n * servos)
+            f.readinto(frames)
+        return cls(frames, tick_ms, servos)
+
+    def play(self, oscillators, cycles=1):
+        """write one frame per tick to the oscillators' servos (trims added by SetPosition)
+        cycles may be fractional, returns the offset of the last frame written"""
+        frames = self.frames
+        count = self.servos
+        tick = self.tick_ms
+        end = self.n_frames * count
+        remaining = int(cycles * self.n_frames)
+        k = 0
+        last = end - count
+        next_tick = utime.ticks_ms()
+        while remaining > 0:
+            for i in range(count):
+                oscillators[i].SetPosition(frames[k + i])
+            last = k
+            k += count
+            if k >= end:
+                k = 0
+            remaining -= 1
+            next_tick = utime.ticks_add(next_tick, tick)
+            while utime.ticks_diff(next_tick, utime.ticks_ms()) > 0:
+                pass
+        return last
+
+    def play_oscillator(self, servos, duration_ms, pos_ms=0):
+        """play an oscillator table paced like Oscillator.refresh: a sample whenever
+        more than tick_ms has passed, each moving the cycle position on by tick_ms
+        (integer ms, wraps at period_ms so the period stays exact)
+        frames already hold the trims, they are written to the servos as they are
+        returns the cycle position to carry on from"""
+        frames = self.frames
+        count = self.servos
+        tick = self.tick_ms
+        period = self.period_ms
+        n = self.n_frames
+        start = utime.ticks_ms()
+        last = utime.ticks_add(start, -tick - 1)   # first sample right away
+        while utime.ticks_diff(utime.ticks_ms(), start) <= duration_ms:
+            now = utime.ticks_ms()
+            if utime.ticks_diff(now, last) > tick:
+                last = now
+                k = pos_ms * n // period * count
+                for i in range(count):
+                    servos[i].write(frames[k + i])
+                pos_ms += tick
+                if pos_ms >= period:
+                    pos_ms -= period
+        return pos_ms
+
+
+if __name__ == '__main__':
+    # quick test
+    import quad
+    robot = quad.Quad()
+    robot.init(12, 16, 25, 18, 13, 17, 26, 19)
+    robot.stand()
+
+    table = GaitTable.load('trot.qgt')
+    print('frames:', table.n_frames, 'tick:', table.tick_ms, 'ms')
+    while True:
+        robot.playTable(table, cycles=4)
+        utime.sleep(0.5)
@@ -2,7 +2,8 @@
 # controls 8 servos for walking, dancing, etc
 
 from micropython import const
-import oscillator, utime, math
+from array import array
+import oscillator, gait_table, utime, math, json
 
 # direction constants
 FORWARD = const(1)
@@ -12,11 +13,53 @@ RIGHT = const(-1)
 SMALL = const(5)
 MEDIUM = const(15)
 BIG = const(30)
+TICK_MS = const(30)       # Oscillator._TS, cycle time each refresh sample moves on
+FRAME_LIMIT = const(256)  # most frames compiled per gait period
+FRAME_BUDGET = const(8192)  # bytes of compiled gait frames kept in RAM
+
+GAIT_FILE = 'gaits.json'
+# parameter block per gait: steps, t, amplitude[8], offset[8], phase[8]
+GAIT_BLOCK = const(26)
 
 def DEG2RAD(g):
     return (g * math.pi) / 180
 
 
+def load_gaits(path=GAIT_FILE):
+    """parse the gait data file once into a single array('h')
+    returns (index, params) - index maps a gait name to its block offset"""
+    with open(path) as f:
+        data = json.load(f)
+    params = array('h', [0] * (GAIT_BLOCK * len(data)))
+    index = {}
+    base = 0
+    for name in data:
+        gait = data[name]
+        index[name] = base
+        params[base] = gait['steps']
+        params[base + 1] = gait['t']
+        for i in range(8):
+            params[base + 2 + i] = gait['amplitude'][i]
+            params[base + 10 + i] = gait['offset'][i]
+            params[base + 18 + i] = gait['phase'][i]
+        base += GAIT_BLOCK
+    return index, params
+
+
+def _gcd(a, b):
+    while b:
+        a, b = b, a % b
+    return a
+
+
+def _servo_angle(degrees):
+    # what Servo.write makes of an angle, so it fits a frame byte
+    degrees = degrees % 360
+    if degrees > 180:
+        degrees = 180
+    return degrees
+
+
 class Quad:
     def __init__(self):
         self._servo_totals = 8
@@ -45,6 +88,20 @@ class Quad:
         # offsets from 90 for each servo (for oscillation center)
         self._stand_offsets = [angle - 90 for angle in self._stand_pose]
 
+        # compiled oscillator gaits, key -> GaitTable
+        # _frame_lru lists the keys least recently used first
+        self._frame_cache = {}
+        self._frame_lru = []
+        self._frame_bytes = 0
+        self._frame_budget = FRAME_BUDGET
+
+        # declarative gaits for run_gait, parsed once here
+        # forward, trot_walk etc. all need them, so fail loudly without the file
+        try:
+            self._gait_index, self._gait_params = load_gaits()
+        except OSError:
+            raise OSError(GAIT_FILE + " not found - upload it next to quad.py")
+
     def deinit(self):
         self.detachServos()
 
@@ -120,6 +177,8 @@ class Quad:
         self._servo[servo_number].SetPosition(position)
         self._servo_position[servo_number] = position
 
+    # Quad's own gaits play compiled tables (_execute), this is kept for
+    # scripts that drive the oscillators directly
     def oscillateServos(self, amplitude, offset, period, phase, cycle=1.0):
         for i in range(self._servo_totals):
             self._servo[i].SetO(offset[i])
@@ -134,27 +193,99 @@ class Quad:
                 self._servo[i].refresh()
             x = float(utime.ticks_ms())
 
+    def run_gait(self, name, steps=None, t=None):
+        """run any gait defined in the gait data file
+        steps and t (period ms) default to the gait's own"""
+        base = self._gait_index[name]
+        p = self._gait_params
+        if steps is None:
+            steps = p[base]
+        if t is None:
+            t = p[base + 1]
+        self._execute(p[base + 2:base + 10], p[base + 10:base + 18],
+                      [t] * self._servo_totals, p[base + 18:base + 26], steps)
+
     def _execute(self, amplitude, offset, period, phase, steps=1.0):
         """run oscillating movement - offsets added to stand pose so
-        oscillations happen around standing position not 90deg"""
-        phase_rad = [DEG2RAD(i) for i in phase]
-
-        # combine movement offsets with stand offsets
-        combined_offset = [offset[i] + self._stand_offsets[i] for i in range(self._servo_totals)]
-
+        oscillations happen around standing position not 90deg
+        the gait is compiled to a frame table on first use, repeats
+        of the same gait and speed are plain table playback"""
+        table = self._gaitTable(amplitude, offset, period, phase)
         self.attachServos()
         if self.getRestState():
             self.setRestState(False)
 
-        # do full cycles
-        cycles = int(steps)
-        if cycles >= 1:
-            i = 0
-            while i < cycles:
-                self.oscillateServos(amplitude, combined_offset, period, phase_rad)
-                i += 1
-        # do remaining partial cycle
-        self.oscillateServos(amplitude, combined_offset, period, phase_rad, float(steps - cycles))
+        # carry on from where the oscillators are in their cycle, as refresh does
+        t = table.period_ms
+        pos = int(self._servo[0]._phase * t / (2 * math.pi) + 0.5) % t
+        pos = table.play_oscillator([osc._servo for osc in self._servo], steps * t, pos)
+        for i in range(self._servo_totals):
+            self._servo[i]._phase = 2 * math.pi * pos / t
+
+    def _gaitTable(self, amplitude, offset, period, phase):
+        """cached frame table of an oscillator gait (LRU within _frame_budget)"""
+        key = (tuple(amplitude), tuple(offset), tuple(period), tuple(phase), tuple(self._stand_pose),
+               tuple((osc._rev, osc._trim) for osc in self._servo))
+        table = self._frame_cache.get(key)
+        if table is not None:
+            self._frame_lru.remove(key)
+            self._frame_lru.append(key)
+            return table
+
+        table = self._compileGait(amplitude, offset, period, phase)
+        size = len(table.frames)
+        if size <= self._frame_budget:
+            self._evictFrames(self._frame_budget - size)
+            self._frame_cache[key] = table
+            self._frame_lru.append(key)
+            self._frame_bytes += size
+        return table
+
+    def _compileGait(self, amplitude, offset, period, phase):
+        """one oscillation period as a frame table, same formula as
+        Oscillator.refresh, trim included so Servo.write wraps and clamps
+        pos + 90 + trim once, as refresh does
+        frames sit gcd(t, TICK_MS) ms apart, on every cycle position the
+        sample clock can reach, unless that takes more than FRAME_LIMIT"""
+        t = int(period[0])
+        n = min(t // _gcd(t, TICK_MS), FRAME_LIMIT)
+        frames = bytearray(n * self._servo_totals)
+        k = 0
+        for j in range(n):
+            for i in range(self._servo_totals):
+                angle = 2 * math.pi * (j * t / n) / period[i] + DEG2RAD(phase[i])
+                pos = round(amplitude[i] * math.sin(angle) + offset[i] + self._stand_offsets[i])
+                if self._servo[i]._rev:
+                    pos = -pos
+                frames[k] = _servo_angle(pos + 90 + self._servo[i]._trim)
+                k += 1
+        return gait_table.GaitTable(frames, TICK_MS, self._servo_totals, t)
+
+    def setFrameBudget(self, budget):
+        """RAM (bytes) the compiled gait cache may use, evicts to fit"""
+        self._frame_budget = budget
+        self._evictFrames(budget)
+
+    def _evictFrames(self, limit):
+        # drop least recently used gaits until the cache fits in limit bytes
+        while self._frame_bytes > limit:
+            old = self._frame_lru.pop(0)
+            self._frame_bytes -= len(self._frame_cache.pop(old).frames)
+
+    def clearFrameCache(self):
+        self._frame_cache = {}
+        self._frame_lru = []
+        self._frame_bytes = 0
+
+    def playTable(self, table, cycles=1):
+        """play a compiled gait frame table (gait_table.GaitTable)
+        no sin() per tick - every frame is already a servo angle"""
+        self.attachServos()
+        if self.getRestState():
+            self.setRestState(False)
+        k = table.play(self._servo, cycles)
+        for i in range(self._servo_totals):
+            self._servo_position[i] = table.frames[k + i]
 
     def getRestState(self):
         return self._isOttoResting
@@ -432,74 +563,18 @@ class Quad:
             print("Obstacle! stopping.")
             return False
 
-        x_amp = 15
-        z_amp = 15
-        ap = 10
-        hi = 15
-        front_x = 6
-        bll_amp = 20    # BLL needs more amplitude
-        bll_offset = -10
-        period = [t] * self._servo_totals
-        amplitude = [x_amp, x_amp, bll_amp, z_amp, x_amp, x_amp, z_amp, z_amp]
-        offset = [0 + ap - front_x,
-                  0 - ap + front_x,
-                  bll_offset,
-                  0 + hi,
-                  0 - ap - front_x,
-                  0 + ap + front_x,
-                  0 + hi,
-                  0 - hi
-                  ]
-        phase = [180, 180, 90, 90,
-                 0, 0, 90, 90]
-        self._execute(amplitude, offset, period, phase, steps)
+        self.run_gait('forward', steps, t)
         return True
 
     def backward(self, steps=3, t=800):
-        x_amp = 15
-        z_amp = 15
-        ap = 10
-        hi = 15
-        front_x = 6
-        bll_amp = 20
-        bll_offset = -10
-        period = [t] * self._servo_totals
-        amplitude = [x_amp, x_amp, bll_amp, z_amp, x_amp, x_amp, z_amp, z_amp]
-        offset = [0 + ap - front_x,
-                  0 - ap + front_x,
-                  bll_offset,
-                  0 + hi,
-                  0 - ap - front_x,
-                  0 + ap + front_x,
-                  0 + hi,
-                  0 - hi
-                  ]
-        phase = [0, 0, 90, 90,
-                 180, 180, 90, 90]
-        self._execute(amplitude, offset, period, phase, steps)
+        self.run_gait('backward', steps, t)
         return True
 
     def turn_L(self, steps=2, t=1000):
-        x_amp = 15
-        z_amp = 15
-        ap = 5
-        hi = 23
-        period = [t] * self._servo_totals
-        amplitude = [x_amp, x_amp, z_amp, z_amp, x_amp, x_amp, z_amp, z_amp]
-        offset = [ap, -ap, -hi, +hi, -ap, ap, hi, -hi]
-        phase = [0, 180, 90, 90, 180, 0, 90, 90]
-        self._execute(amplitude, offset, period, phase, steps)
+        self.run_gait('turn_L', steps, t)
 
     def turn_R(self, steps=2, t=1000):
-        x_amp = 15
-        z_amp = 15
-        ap = 5
-        hi = 23
-        period = [t] * self._servo_totals
-        amplitude = [x_amp, x_amp, z_amp, z_amp, x_amp, x_amp, z_amp, z_amp]
-        offset = [ap, -ap, -hi, +hi, -ap, ap, hi, -hi]
-        phase = [180, 0, 90, 90, 0, 180, 90, 90]
-        self._execute(amplitude, offset, period, phase, steps)
+        self.run_gait('turn_R', steps, t)
 
     def omni_walk(self, steps=2, t=1000, side=True, turn_factor=2):
         x_amp = 15
@@ -529,75 +604,27 @@ class Quad:
         else:
             phase1 = [0, 0, 90, 90, 180, 180, 90, 90]
             phase2L = [180, 0, 90, 90, 0, 180, 90, 90]
+            # _execute carries the cycle position over from the last move
             for i in range(self._servo_totals):
-                phase[i] = phase1[i] * (1 - turn_factor) + phase2L[i] * turn_factor + self._servo[
-                    i]._phase
+                phase[i] = phase1[i] * (1 - turn_factor) + phase2L[i] * turn_factor
         self._execute(amplitude, offset, period, phase, steps)
 
     # --- fun moves ---
 
     def dance(self, steps=3, t=2000):
-        x_amp = 0
-        z_amp = 30
-        ap = 0
-        hi = 20
-        period = [t] * self._servo_totals
-        amplitude = [x_amp, x_amp, z_amp, z_amp, x_amp, x_amp, z_amp, z_amp]
-        offset = [ap, -ap, -hi, +hi, -ap, ap, hi, -hi]
-        phase = [0, 0, 0, 270, 0, 0, 90, 180]
-        self._execute(amplitude, offset, period, phase, steps)
+        self.run_gait('dance', steps, t)
 
     def front_back(self, steps=2, t=1000):
-        x_amp = 30
-        z_amp = 20
-        ap = 15
-        hi = 30
-        period = [t] * self._servo_totals
-        amplitude = [x_amp, x_amp, z_amp, z_amp, x_amp, x_amp, z_amp, z_amp]
-        offset = [ap, -ap, -hi, hi, -ap, ap, hi, -hi]
-        phase = [0, 180, 270, 90, 0, 180, 90, 270]
-        self._execute(amplitude, offset, period, phase, steps)
+        self.run_gait('front_back', steps, t)
 
     def moonwalk_L(self, steps=4, t=2000):
-        z_amp = 25
-        o = 5
-        period = [t] * self._servo_totals
-        amplitude = [0, 0, z_amp, z_amp, 0, 0, z_amp, z_amp]
-        offset = [0, 0, -z_amp - o, z_amp + o, 0, 0, z_amp + o, -z_amp - o]
-        phase = [0, 0, 0, 80, 0, 0, 160, 290]
-        self._execute(amplitude, offset, period, phase, steps)
+        self.run_gait('moonwalk_L', steps, t)
 
     def up_down(self, steps=2, t=2000):
-        x_amp = 0
-        z_amp = 35
-        ap = 10
-        hi = 15
-        front_x = 0
-        period = [t] * self._servo_totals
-        amplitude = [x_amp, x_amp, z_amp, z_amp, x_amp, x_amp, z_amp, z_amp]
-        offset = [
-            ap - front_x,
-            -ap + front_x,
-            -hi,
-            hi,
-            -ap - front_x,
-            ap + front_x,
-            hi,
-            -hi
-        ]
-        phase = [0, 0, 90, 270, 180, 180, 270, 90]
-        self._execute(amplitude, offset, period, phase, steps)
+        self.run_gait('up_down', steps, t)
 
     def push_up(self, steps=2, t=2000):
-        z_amp = 40
-        x_amp = 45
-        hi = 0
-        b = 35
-        period = [t] * self._servo_totals
-        amplitude = [0, 0, z_amp, z_amp, 0, 0, 0, 0]
-        offset = [0, 0, -hi, hi, x_amp, -x_amp, b, -b]
-        phase = [0, 0, 90, -90, 0, 0, 0, 0]
-        self._execute(amplitude, offset, period, phase, steps)
+        self.run_gait('push_up', steps, t)
 
     def hello(self):
         """wave hello gesture"""
@@ -627,20 +654,10 @@ class Quad:
         self._moveServos(300, self._stand_pose)
 
     def wave_hand(self, steps=3, t=2000):
-        period = [t] * self._servo_totals
-        amplitude = [20, 0, 0, 30, 0, 0, 0, 0]
-        offset = [-50, 0, 20, 60, 0, 0, 0, 0]
-        phase = [0] * self._servo_totals
-        self._execute(amplitude, offset, period, phase, steps)
+        self.run_gait('wave_hand', steps, t)
 
     def hide(self, steps=1.0, t=2000):
-        a = 60
-        b = 70
-        period = [t] * self._servo_totals
-        amplitude = [0, 0, 0, 0, 0, 0, 0, 0]
-        offset = [-a, a, b, -b, a, -a, -b, b]
-        phase = [0, 0, 0, 0, 0, 0, 0, 0]
-        self._execute(amplitude, offset, period, phase, steps)
+        self.run_gait('hide', steps, t)
 
     def scared(self):
         """scared reaction lol"""
@@ -677,60 +694,7 @@ class Quad:
             print("Obstacle! stopping trot.")
             return False
 
-        hip_amp = 18    # lateral movement
-        leg_amp = 20    # vertical lift
-        body_tilt = 12  # weight transfer
-
-        period = [t] * self._servo_totals
-
-        # order: FRH, FLH, FRL, FLL, BRH, BLH, BRL, BLL
-        amplitude = [
-            hip_amp,   # FRH
-            hip_amp,   # FLH
-            leg_amp,   # FRL
-            leg_amp,   # FLL
-            hip_amp,   # BRH
-            hip_amp,   # BLH
-            leg_amp,   # BRL
-            leg_amp    # BLL
-        ]
-
-        offset = [
-            0,            # FRH
-            0,            # FLH
-            -body_tilt,   # FRL
-            body_tilt,    # FLL
-            0,            # BRH
-            0,            # BLH
-            body_tilt,    # BRL
-            -body_tilt    # BLL
-        ]
-
-        # diagonal pairs: pair1 (FL+BR) vs pair2 (FR+BL), 180deg apart
-        if direction == FORWARD:
-            phase = [
-                0,    # FRH  (pair 2)
-                180,  # FLH  (pair 1)
-                90,   # FRL  (pair 2, leg lift offset)
-                270,  # FLL  (pair 1, leg lift offset)
-                180,  # BRH  (pair 1)
-                0,    # BLH  (pair 2)
-                270,  # BRL  (pair 1, leg lift offset)
-                90    # BLL  (pair 2, leg lift offset)
-            ]
-        else:
-            phase = [
-                180,  # FRH
-                0,    # FLH
-                270,  # FRL
-                90,   # FLL
-                0,    # BRH
-                180,  # BLH
-                90,   # BRL
-                270   # BLL
-            ]
-
-        self._execute(amplitude, offset, period, phase, steps)
+        self.run_gait('trot_walk' if direction == FORWARD else 'trot_walk_back', steps, t)
         return True
 
 
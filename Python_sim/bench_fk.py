@@ -0,0 +1,57 @@
+# @file
+#  @Vu H
+
+"""
+Forward kinematics benchmark: QuadrupedRobot.forward_kinematics over a whole
+joint trajectory against the per-leg foward_kinematic loop it replaced
+(reproduced here as it was, three small arrays per leg per frame).
+The vectorized call is bound by float64 sin/cos and by writing the
+(N, 4, 3, 3) result, so the ratio falls as trajectories outgrow the cache.
+"""
+
+import statistics
+import time
+import numpy as np
+
+from kinematics import QuadrupedRobot
+
+SIZES = (1_000, 10_000, 100_000)
+LOOP_FRAMES = 2_000  # the loop is timed on a prefix, its cost per frame is flat
+
+
+def _leg_loop(robot, q):
+    a1, a2 = robot.a1, robot.a2
+    for frame in q:
+        for leg, p0 in enumerate(robot.leg_bases):
+            t1, t2 = frame[2 * leg], frame[2 * leg + 1]
+            p1 = p0 + np.array([a1 * np.cos(t1), a1 * np.sin(t1), 0])
+            p2 = p1 + np.array([a2 * np.cos(t1) * np.cos(t2), a2 * np.sin(t1) * np.cos(t2), a2 * np.sin(t2)])
+            np.array([p0, p1, p2])
+
+
+def _per_frame(fn, frames, repeats=7):
+    times = []
+    for _ in range(repeats):
+        t = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t)
+    return statistics.median(times) / frames
+
+
+def bench(sizes=SIZES):
+    """
+    Returns:
+        loop: seconds per frame of the per-leg loop
+        vectorized: {N: seconds per frame of forward_kinematics on N frames}
+    """
+    robot = QuadrupedRobot()
+    q = np.random.default_rng(0).uniform(-np.pi / 2, np.pi / 2, (max(sizes), 8))
+    loop = _per_frame(lambda: _leg_loop(robot, q[:LOOP_FRAMES]), LOOP_FRAMES, repeats=3)
+    return loop, {n: _per_frame(lambda: robot.forward_kinematics(q[:n]), n) for n in sizes}
+
+
+if __name__ == "__main__":
+    loop, vectorized = bench()
+    print(f"per-leg loop          {loop * 1e6:8.2f} us/frame")
+    for n, t in vectorized.items():
+        print(f"vectorized, {n:>7d} frames {t * 1e6:6.3f} us/frame  ({loop / t:5.1f}x)")
@@ -0,0 +1,112 @@
+# @file
+#  @Vu H
+
+"""
+Per-tick CPU cost of the firmware gait players, on the host.
+Micropython/oscillator.py and quad.py are imported with host stand-ins for
+machine, utime and micropython (a PWM that drops duties, a clock the
+benchmark drives), so the timings cover exactly the firmware's own Python:
+8 x Oscillator.refresh with sin() per tick against 8 x SetPosition from a
+compiled frame table, plus the one-off compile and the cached lookup.
+Absolute numbers are host numbers; the ratio is what carries over.
+"""
+
+import os
+import statistics
+import sys
+import time
+import types
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+FIRMWARE_DIR = os.path.join(HERE, '..', 'Micropython')
+
+
+class _Clock:
+    ms = 0
+
+
+def _install_host_modules():
+    utime = types.ModuleType('utime')
+    utime.ticks_ms = lambda: _Clock.ms
+    utime.ticks_add = lambda a, b: a + b
+    utime.ticks_diff = lambda a, b: a - b
+    utime.sleep = utime.sleep_ms = lambda _: None
+    machine = types.ModuleType('machine')
+    machine.Pin = lambda pin: pin
+    machine.PWM = type('PWM', (), {'__init__': lambda self, pin, freq: None,
+                                   'duty': lambda self, d: None, 'deinit': lambda self: None})
+    micropython = types.ModuleType('micropython')
+    micropython.const = lambda x: x
+    sys.modules.update(utime=utime, machine=machine, micropython=micropython)
+    time.ticks_ms = utime.ticks_ms  # oscillator.py reads the clock through time
+    sys.path.insert(0, FIRMWARE_DIR)
+    os.chdir(FIRMWARE_DIR)  # quad.py opens gaits.json from the working directory, as on the board
+
+
+def _best_of(fn, repeats=7):
+    times = []
+    for _ in range(repeats):
+        t = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t)
+    return statistics.median(times)
+
+
+def bench(ticks=20000):
+    """
+    Returns:
+        dict of seconds per tick (oscillator, table) and per command (compile, cached lookup)
+    """
+    _install_host_modules()
+    import firmware
+    import quad
+
+    robot = quad.Quad()
+    robot.init(12, 16, 25, 18, 13, 17, 26, 19)
+    amplitude, offset, period, phase = firmware.FIRMWARE_GAITS['forward'][0]()
+    servos = robot._servo
+    count = robot._servo_totals
+
+    def oscillator_ticks():
+        # the setup oscillateServos does, then one due refresh per servo per tick
+        for i in range(count):
+            servos[i].SetO(offset[i] + robot._stand_offsets[i])
+            servos[i].SetA(amplitude[i])
+            servos[i].SetT(period[i])
+            servos[i].SetPh(quad.DEG2RAD(phase[i]))
+        for _ in range(ticks):
+            _Clock.ms += firmware.SAMPLE_MS
+            for i in range(count):
+                servos[i].refresh()
+
+    table = robot._gaitTable(amplitude, offset, period, phase)
+    frames, n, t, tick = table.frames, table.n_frames, table.period_ms, table.tick_ms
+
+    def table_ticks():
+        # one GaitTable.play_oscillator sample, without its clock polling
+        pos = 0
+        for _ in range(ticks):
+            k = pos * n // t * count
+            for i in range(count):
+                servos[i]._servo.write(frames[k + i])
+            pos += tick
+            if pos >= t:
+                pos -= t
+
+    def compile_cold():
+        robot.clearFrameCache()
+        robot._gaitTable(amplitude, offset, period, phase)
+
+    return {
+        'oscillator': _best_of(oscillator_ticks) / ticks,
+        'table': _best_of(table_ticks) / ticks,
+        'compile': _best_of(compile_cold),
+        'lookup': _best_of(lambda: robot._gaitTable(amplitude, offset, period, phase)),
+    }
+
+
+if __name__ == "__main__":
+    r = bench()
+    print(f"oscillator refresh  {r['oscillator'] * 1e6:8.1f} us/tick")
+    print(f"frame table         {r['table'] * 1e6:8.1f} us/tick  ({r['oscillator'] / r['table']:.1f}x less CPU)")
+    print(f"first use compile   {r['compile'] * 1e6:8.1f} us, cached lookup {r['lookup'] * 1e6:.1f} us per command")
@@ -0,0 +1,44 @@
+# @file
+#  @Vu H
+
+"""
+Cold-start import benchmark.
+Each case runs in a fresh interpreter so nothing is cached between runs.
+"before" imports what spiquad used to pull in at load time
+(matplotlib, Slider, roboticstoolbox) and builds the four DHRobot legs.
+"""
+
+import os
+import statistics
+import subprocess
+import sys
+
+CASES = {
+    "kinematics (headless core)":
+        "import kinematics; kinematics.QuadrupedRobot()",
+    "spiquad (lazy plotting)":
+        "import spiquad; spiquad.QuadrupedRobot()",
+    "before: matplotlib + roboticstoolbox + DH legs":
+        "import matplotlib.pyplot; from matplotlib.widgets import Slider; "
+        "import roboticstoolbox; import kinematics; kinematics.QuadrupedRobot().legs",
+}
+
+
+def time_import(stmt, repeats=5):
+    """
+    Median time (s) spent running stmt inside a fresh interpreter.
+    """
+    here = os.path.dirname(os.path.abspath(__file__))
+    code = f"import time; t = time.perf_counter(); {stmt}; print(time.perf_counter() - t)"
+    times = []
+    for _ in range(repeats):
+        out = subprocess.run([sys.executable, "-c", code], cwd=here, capture_output=True, text=True, check=True)
+        times.append(float(out.stdout.strip().splitlines()[-1]))
+    return statistics.median(times)
+
+
+if __name__ == "__main__":
+    results = {name: time_import(stmt) for name, stmt in CASES.items()}
+    before = results["before: matplotlib + roboticstoolbox + DH legs"]
+    for name, t in results.items():
+        print(f"{name:48s} {t * 1000:8.1f} ms  ({before / t:5.1f}x)")
@@ -0,0 +1,148 @@
+# @file
+#  @Vu H
+
+"""
+Floating-base body pose from foot contacts.
+The body is no longer pinned at body_height: per frame the height, roll
+and pitch are fitted so the stance feet sit on the ground plane z = 0,
+by a batched Gauss-Newton least squares over all frames at once. The
+fitted motion also gives the signals the MPU6500 on the body would read.
+
+usage:
+  python body_pose.py --gait six_step
+"""
+
+import argparse
+import numpy as np
+
+from kinematics import DEFAULT_MODEL
+from stability import STANCE_TOL
+
+G = 9.80665  # m/s²
+ANGLE_REG = 1e-9  # pulls roll / pitch towards level when the stance does not fix them (two feet)
+
+
+def contact_mask(feet, tol=STANCE_TOL):
+    """
+    (N, L) stance feet of a floating body: the lowest foot of each frame and
+    every foot within tol of it, the body settles until they touch.
+    """
+    z = np.asarray(feet)[..., 2]
+    return z - z.min(axis=1, keepdims=True) <= tol
+
+
+def rotation(roll, pitch):
+    """
+    (N, 3, 3) body-to-world rotation, roll about x then pitch about y.
+    """
+    cr, sr = np.cos(roll), np.sin(roll)
+    cp, sp = np.cos(pitch), np.sin(pitch)
+    R = np.empty(np.shape(roll) + (3, 3))
+    R[..., 0, 0] = cp
+    R[..., 0, 1] = sp * sr
+    R[..., 0, 2] = sp * cr
+    R[..., 1, 0] = 0.0
+    R[..., 1, 1] = cr
+    R[..., 1, 2] = -sr
+    R[..., 2, 0] = -sp
+    R[..., 2, 1] = cp * sr
+    R[..., 2, 2] = cp * cr
+    return R
+
+
+def fit_body_pose(feet, center=(0.0, 0.0, DEFAULT_MODEL.body_height), stance=None, tol=STANCE_TOL, iterations=4):
+    """
+    Body height, roll and pitch that put the stance feet on the ground.
+    Args:
+        feet: (N, L, 3) foot positions in the body frame of kinematics (leg
+            bases at z = body_height, i.e. robot.leg_bases + leg-frame feet)
+        center: body origin in that frame, the point whose height is returned
+        stance: optional (N, L) stance mask, contact_mask otherwise (and for frames without stance feet)
+        tol: passed to contact_mask
+        iterations: Gauss-Newton steps, the first one is the small-angle solution
+
+    Returns:
+        height: (N,) body origin height above ground (m)
+        roll, pitch: (N,) body attitude (rad)
+    """
+    feet = np.asarray(feet, dtype=float)
+    b = feet - np.asarray(center, dtype=float)
+    lowest = contact_mask(feet, tol)
+    w = lowest if stance is None else np.asarray(stance, dtype=bool)
+    # a frame with every foot in the air settles onto its lowest feet
+    w = np.where(w.any(axis=1, keepdims=True), w, lowest).astype(float)
+    x, y, z = b[..., 0], b[..., 1], b[..., 2]
+    n = len(feet)
+
+    params = np.zeros((n, 3))  # height, roll, pitch
+    params[:, 0] = -(w * z).sum(axis=1) / np.maximum(w.sum(axis=1), 1)
+    reg = np.diag([0.0, ANGLE_REG, ANGLE_REG])
+    for _ in range(iterations):
+        h, roll, pitch = params[:, :1], params[:, 1:2], params[:, 2:]
+        cr, sr = np.cos(roll), np.sin(roll)
+        cp, sp = np.cos(pitch), np.sin(pitch)
+        # world height of each foot and its derivatives w.r.t. (h, roll, pitch)
+        zw = h - sp * x + cp * sr * y + cp * cr * z
+        J = np.stack([np.ones_like(zw), cp * cr * y - cp * sr * z, -cp * x - sp * sr * y - sp * cr * z], axis=-1)
+        JtW = J.transpose(0, 2, 1) * w[:, None]
+        # regularized normal equations, the angle prior also keeps them solvable with < 3 contacts
+        A = JtW @ J + reg
+        rhs = -(JtW @ zw[..., None])[..., 0] - params * np.diag(reg)
+        params += np.linalg.solve(A, rhs[..., None])[..., 0]
+    return params[:, 0], params[:, 1], params[:, 2]
+
+
+def world_positions(points, height, roll, pitch, center=(0.0, 0.0, DEFAULT_MODEL.body_height)):
+    """
+    Body-frame points (N, ..., 3) mapped to the world frame of the fitted pose.
+    """
+    points = np.asarray(points, dtype=float) - np.asarray(center, dtype=float)
+    R = rotation(roll, pitch)
+    shape = points.shape
+    world = (points.reshape(len(points), -1, 3) @ R.transpose(0, 2, 1)).reshape(shape)
+    world[..., 2] += np.reshape(height, (-1,) + (1,) * (len(shape) - 2))
+    return world
+
+
+def imu_signals(height, roll, pitch, dt):
+    """
+    What a body-mounted MPU6500 reads for the fitted motion, in get_all() units.
+    Returns:
+        accel: (N, 3) specific force in body axes (g)
+        gyro: (N, 3) body angular rate (deg/s)
+    """
+    roll_rate = np.gradient(roll, dt)
+    pitch_rate = np.gradient(pitch, dt)
+    # Euler rates to body rates for roll-then-pitch with no yaw
+    gyro = np.stack([roll_rate, np.cos(roll) * pitch_rate, -np.sin(roll) * pitch_rate], axis=-1)
+    # specific force: vertical acceleration plus gravity, seen in body axes
+    f_world = np.zeros((len(height), 3))
+    f_world[:, 2] = np.gradient(np.gradient(height, dt), dt) + G
+    accel = (f_world[:, None] @ rotation(roll, pitch))[:, 0] / G
+    return accel, np.degrees(gyro)
+
+
+def main(argv=None):
+    from kinematics import QuadrupedRobot
+    from simulate import GAITS
+
+    parser = argparse.ArgumentParser(description="Floating-base body pose of a gait")
+    parser.add_argument("--gait", choices=sorted(GAITS), default="six_step")
+    parser.add_argument("--samples", type=int, default=120, help="gait phases per cycle")
+    args = parser.parse_args(argv)
+
+    robot = QuadrupedRobot()
+    feet_fn, period = GAITS[args.gait]
+    phases = np.arange(args.samples) / args.samples
+    q, _ = robot.inverse_kinematics_batch(feet_fn(robot, phases))
+    feet = robot.forward_kinematics(q)[:, :, 2]
+    height, roll, pitch = fit_body_pose(feet, robot.leg_bases.mean(axis=0))
+    accel, gyro = imu_signals(height, roll, pitch, period / args.samples)
+
+    print(f"{args.gait}: height {height.min() * 1000:.1f} .. {height.max() * 1000:.1f} mm, "
+          f"roll {np.degrees(np.abs(roll)).max():.2f} deg, pitch {np.degrees(np.abs(pitch)).max():.2f} deg, "
+          f"peak gyro {np.abs(gyro).max():.1f} deg/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -7,13 +7,10 @@ Demo: gait 2DOF.
 offsets, and drive the 2-DOF legs via the existing inverse kinematics in the define model.
 """
 
-import time
+from collections import OrderedDict
 import numpy as np
-import matplotlib.pyplot as plt
-from math import pi
-from roboticstoolbox import mstraj
 from spiquad import *
-from mpl_toolkits.mplot3d.art3d import Poly3DCollection
+from trajectory import BezierFootCycle, mstraj
 
 
 # Gait param
@@ -31,132 +28,185 @@ TACC = 0.05
 LEG_PHASE_OFFSETS = {"FL": 0.0,"BR": 0.0,"FR": 0.5,"BL": 0.5,}
 
 
-def build_foot_cycle(step_length=STEP_LENGTH, z_down=Z_DOWN, z_up=Z_UP): #cyclic rec foot path using mstraj
+def build_foot_cycle(step_length=None, z_down=None, z_up=None, t_segments=None, dt=None, tacc=None): #cyclic rec foot path using mstraj (native, no roboticstoolbox)
+    # unset parameters take the module's gait params as they are at call time
+    step_length = STEP_LENGTH if step_length is None else step_length
+    z_down = Z_DOWN if z_down is None else z_down
+    z_up = Z_UP if z_up is None else z_up
+    t_segments = T_SEGMENTS if t_segments is None else t_segments
+    dt = DT if dt is None else dt
+    tacc = TACC if tacc is None else tacc
 
     xf = step_length / 2.0
     xb = -xf
 
     # Rectangular loop: stance (xf->xb at ground), lift, swing forward, lower
     segments = np.array([[xf, 0.0, z_down],[xb, 0.0, z_down],[xb, 0.0, z_up],[xf, 0.0, z_up],[xf, 0.0, z_down],])
-    traj = mstraj(segments, tsegment=T_SEGMENTS, dt=DT, tacc=TACC)
-    cycle = traj.q
+    cycle = mstraj(segments, t_segments, dt, tacc)
     cycle = np.vstack((cycle, cycle[-3:, :]))
     return cycle
 FOOT_CYCLE = build_foot_cycle()
 CYCLE_LEN = FOOT_CYCLE.shape[0]
 
+# continuous alternative to FOOT_CYCLE, stance for the first segment then Bezier swing
+BEZIER_CYCLE = BezierFootCycle(STEP_LENGTH, STEP_HEIGHT, T_SEGMENTS[0] / sum(T_SEGMENTS), sum(T_SEGMENTS))
+
+# max number of gait tables kept in the cache (least recently used evicted first)
+GAIT_TABLE_CACHE_SIZE = 16
+_gait_table_cache = OrderedDict()
+
 
 def get_cycle_index(phase: float) -> int:
     return int((phase % 1.0) * CYCLE_LEN) % CYCLE_LEN
 
 
-def get_joint_config_from_cycle(robot: QuadrupedRobot, phase: float):
+def cycle_foot_positions(robot, phases, foot_cycle=FOOT_CYCLE, phase_offsets=None):
     """
-    Compute an 8x1 joint vector using the precomputed foot cycle and leg phase offsets.
+    Foot targets for all legs over an array of gait phases.
+    Args:
+        robot: QuadrupedRobot
+        phases: (N,) gait phases
+        foot_cycle: sampled (n, 3) cycle, linearly interpolated in phase, or any
+            object with evaluate(phases) such as BezierFootCycle
+        phase_offsets: per-leg phase offsets, defaults to LEG_PHASE_OFFSETS
+
+    Returns:
+        feet: (N, 4, 3) foot targets in leg frame, legs in leg_names order
     """
-    q = []
-    for name in robot.leg_names:
-        p_leg = (phase + LEG_PHASE_OFFSETS[name]) % 1.0
-        idx = get_cycle_index(p_leg)
-        dx, dy, dz = FOOT_CYCLE[idx]
-
-        neutral = robot.default_foot_positions[name]
-        foot = neutral + np.array([dx, dy, dz])
+    phase_offsets = LEG_PHASE_OFFSETS if phase_offsets is None else phase_offsets
+    phases = np.asarray(phases, dtype=float)
+    offsets = np.array([phase_offsets[name] for name in robot.leg_names])
+    leg_phases = (phases[:, None] + offsets) % 1.0
 
-        t1, t2 = robot.inverse_kinematics(foot[0], foot[1], foot[2])
-        q.extend([t1, t2])
+    if hasattr(foot_cycle, "evaluate"):
+        pos, _, _ = foot_cycle.evaluate(leg_phases.ravel())
+        return robot.default_stance + pos.reshape(leg_phases.shape + (3,))
 
-    return np.array(q)
+    n = foot_cycle.shape[0]
+    x = leg_phases * n
+    i0 = x.astype(int) % n
+    f = (x - np.floor(x))[..., None]
+    return robot.default_stance + (1 - f) * foot_cycle[i0] + f * foot_cycle[(i0 + 1) % n]
 
 
-def visualize_gait():
-    plt.close("all")
-    robot = QuadrupedRobot()
-    workspace = [-0.15, 0.15, -0.15, 0.15, 0.0, 0.20]
-    fig = plt.figure(figsize=(12, 10))
-    ax = fig.add_subplot(111, projection="3d")
-    ax.set_xlim(workspace[0], workspace[1])
-    ax.set_ylim(workspace[2], workspace[3])
-    ax.set_zlim(workspace[4], workspace[5])
-    ax.set_xlabel("X (m)")
-    ax.set_ylabel("Y (m)")
-    ax.set_zlabel("Z (m)")
-    ax.set_title("Quadruped Robot - apply Gait")
-
-    body_corners = np.array(
-        [
-            [BODY_SIZE / 2, BODY_SIZE / 2, 0.10],
-            [BODY_SIZE / 2, -BODY_SIZE / 2, 0.10],
-            [-BODY_SIZE / 2, -BODY_SIZE / 2, 0.10],
-            [-BODY_SIZE / 2, BODY_SIZE / 2, 0.10],
-            [BODY_SIZE / 2, BODY_SIZE / 2, 0.10],
-        ]
-    )
-
-    body_line, = ax.plot(
-        body_corners[:, 0],
-        body_corners[:, 1],
-        body_corners[:, 2],
-        "k-",
-        linewidth=4,
-        label="Body",
-        zorder=5,
-    )
-
-
-
-    poly = Poly3DCollection([body_corners[:4]], alpha=0.3, facecolor="cyan", edgecolor="black")
-    ax.add_collection3d(poly)
-    leg_colors = {"FL": "red", "FR": "blue", "BL": "green", "BR": "orange"}
-    leg_plots = {}
-    hip_plots = {}
-    foot_plots = {}
-
-    # Initialize plots
-    q0 = get_joint_config_from_cycle(robot, 0.0)
-    for i, name in enumerate(robot.leg_names):
-        q_leg = np.array([q0[i * 2], q0[i * 2 + 1]])
-        base_pos = robot.leg_positions[name]
-        positions = robot.forward_kinematics(q_leg[0], q_leg[1], base_pos)
-        line, = ax.plot(positions[:, 0],positions[:, 1],positions[:, 2],color=leg_colors[name],linewidth=5,alpha=0.9,label=f"Leg {name}",zorder=10,)
-        leg_plots[name] = line
-
-        hip, = ax.plot([positions[1, 0]],[positions[1, 1]],[positions[1, 2]],"o",color="orange",markersize=12,markeredgecolor="black",markeredgewidth=2,zorder=11,)
-        hip_plots[name] = hip
-
-        foot, = ax.plot([positions[2, 0]],[positions[2, 1]],[positions[2, 2]],"o",color="black",markersize=10,markeredgecolor=leg_colors[name],markeredgewidth=3,zorder=11,)
-        foot_plots[name] = foot
-
-    ax.legend(loc="upper right")
-    ax.grid(True, alpha=0.3)
-    phase = 0.0
-    try:
-        while True:
-            q = get_joint_config_from_cycle(robot, phase)
-
-            for i, name in enumerate(robot.leg_names):
-                q_leg = np.array([q[i * 2], q[i * 2 + 1]])
-                base_pos = robot.leg_positions[name]
-                positions = robot.forward_kinematics(q_leg[0], q_leg[1], base_pos)
+class GaitTable:
+    """
+    Joint angles for all legs across one gait cycle, leg phase offsets baked in.
+    Built once from a foot cycle, then sampled in phase with linear or cubic
+    (Catmull-Rom) interpolation via per-segment polynomial coefficients.
+    """
 
-                leg_plots[name].set_data(positions[:, 0], positions[:, 1])
-                leg_plots[name].set_3d_properties(positions[:, 2])
+    def __init__(self, robot, foot_cycle, phase_offsets=None):
+        phase_offsets = LEG_PHASE_OFFSETS if phase_offsets is None else phase_offsets
+        n = foot_cycle.shape[0]
+        self.n = n
+
+        # foot targets at every knot k (phase k/n) for every leg
+        feet = cycle_foot_positions(robot, np.arange(n) / n, foot_cycle, phase_offsets)
+
+        q, self.reachable = robot.inverse_kinematics_batch(feet)
+        # keep angles continuous so interpolation never crosses the +-pi seam
+        q = np.unwrap(q, axis=0)
+        self.q = q
+
+        p0 = np.roll(q, 1, axis=0)
+        p1 = q
+        p2 = np.roll(q, -1, axis=0)
+        p3 = np.roll(q, -2, axis=0)
+        # coefficients per segment, lowest order first: value = sum(c[j] * f**j)
+        self._coeffs = {
+            'linear': np.stack([p1, p2 - p1], axis=1),
+            'cubic': np.stack([
+                p1,
+                0.5 * (p2 - p0),
+                p0 - 2.5 * p1 + 2.0 * p2 - 0.5 * p3,
+                -0.5 * p0 + 1.5 * p1 - 1.5 * p2 + 0.5 * p3,
+            ], axis=1),
+        }
+
+    def sample(self, phase, out=None, kind='linear'):
+        """
+        Joint angles at a gait phase, O(1) and without allocating when out is given.
+        Args:
+            phase: gait phase (wraps at 1.0)
+            out: optional preallocated (8,) buffer
+            kind: 'linear' or 'cubic'
+
+        Returns:
+            q: (8,) joint angles [FL_hip, FL_knee, FR_hip, FR_knee, ...]
+        """
+        coeffs = self._coeffs[kind]
+        x = (phase % 1.0) * self.n
+        i = int(x)
+        f = x - i
+        if i >= self.n:
+            i, f = 0, 0.0
+        c = coeffs[i]
+        if out is None:
+            out = np.empty(c.shape[1])
+        # Horner evaluation in place
+        out[:] = c[-1]
+        for j in range(len(c) - 2, -1, -1):
+            out *= f
+            out += c[j]
+        return out
+
+
+def get_gait_table(robot, step_length=None, step_height=None, t_segments=None, dt=None, tacc=None,
+                   phase_offsets=None):
+    """
+    Cached GaitTable for a gait parameter set, built on first request.
+    Unset parameters default to the module's gait params as they are at call time.
+    """
+    step_length = STEP_LENGTH if step_length is None else step_length
+    step_height = STEP_HEIGHT if step_height is None else step_height
+    t_segments = T_SEGMENTS if t_segments is None else t_segments
+    dt = DT if dt is None else dt
+    tacc = TACC if tacc is None else tacc
+    phase_offsets = LEG_PHASE_OFFSETS if phase_offsets is None else phase_offsets
+    key = (step_length, step_height, tuple(t_segments), dt, tacc,
+           tuple(sorted(phase_offsets.items())), robot.model)
+    table = _gait_table_cache.get(key)
+    if table is not None:
+        _gait_table_cache.move_to_end(key)
+        return table
+
+    cycle = build_foot_cycle(step_length, Z_DOWN, Z_DOWN + step_height, t_segments, dt, tacc)
+    table = GaitTable(robot, cycle, phase_offsets)
+    _gait_table_cache[key] = table
+    while len(_gait_table_cache) > GAIT_TABLE_CACHE_SIZE:
+        _gait_table_cache.popitem(last=False)
+    return table
+
+
+def get_joint_config_from_cycle(robot: QuadrupedRobot, phase: float, kind='linear', foot_cycle=None):
+    """
+    Compute an 8x1 joint vector by sampling the cached gait table for the current gait params.
+    If foot_cycle (e.g. BEZIER_CYCLE) is given, feet come from its closed form instead of FOOT_CYCLE.
+    """
+    if foot_cycle is None:
+        return get_gait_table(robot).sample(phase, kind=kind)
 
-                hip_plots[name].set_data([positions[1, 0]], [positions[1, 1]])
-                hip_plots[name].set_3d_properties([positions[1, 2]])
+    feet = cycle_foot_positions(robot, np.array([phase]), foot_cycle)
+    q, _ = robot.inverse_kinematics_batch(feet)
+    return q[0]
 
-                foot_plots[name].set_data([positions[2, 0]], [positions[2, 1]])
-                foot_plots[name].set_3d_properties([positions[2, 2]])
 
-            ax.set_title(f"Quadruped Robot - Walking Phase: {phase % 1.0:.2f})")
-            fig.canvas.draw()
-            fig.canvas.flush_events()
-            plt.pause(0.001)
-            phase = (phase + DT / sum(T_SEGMENTS)) % 1.0
-            time.sleep(0.02)
+def visualize_gait():
+    import matplotlib.pyplot as plt
+    from renderer import RealtimeRenderer
 
+    plt.close("all")
+    robot = QuadrupedRobot()
+    renderer = RealtimeRenderer(
+        robot, lambda phase: get_joint_config_from_cycle(robot, phase), sum(T_SEGMENTS),
+        label_fn=lambda phase: f"Walking Phase: {phase:.2f}",
+        title="Quadruped Robot - apply Gait", floating_base=True)
+    try:
+        renderer.play()
     except KeyboardInterrupt:
-        plt.close("all")
+        pass
+    plt.close("all")
 
 
 if __name__ == "__main__":
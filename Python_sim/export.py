@@ -0,0 +1,154 @@
+# @file
+#  @Vu H
+
+"""
+Offscreen (Agg) export of gait animations.
+Frames for a phase range are rendered in parallel by a process pool, each
+worker holding its own persistent GaitScene, and are written in order as
+they complete: MP4/GIF are streamed to ffmpeg as raw RGBA, a directory
+gets a PNG sequence. Only a small window of frames is in flight at a time.
+
+usage:
+  python export.py --gait trot --cycles 2 --out mainmove.mp4
+  python export.py --gait six_step --out frames/ --workers 8
+"""
+
+import argparse
+import os
+import shutil
+import subprocess
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+
+from simulate import GAITS
+
+FPS = 30
+DPI = 100
+FIGSIZE = (12, 10)
+
+# per-worker state, set up once by _init_worker
+_robot = None
+_scene = None
+_feet_fn = None
+
+
+def _init_worker(gait, dpi, floating_base=False):
+    global _robot, _scene, _feet_fn
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+    from kinematics import QuadrupedRobot
+    from renderer import GaitScene
+
+    _robot = QuadrupedRobot()
+    _feet_fn = GAITS[gait][0]
+    fig = plt.figure(figsize=FIGSIZE, dpi=dpi)
+    _scene = GaitScene(_robot, title=f"Quadruped Robot - {gait}", animated=False, fig=fig, floating_base=floating_base)
+
+
+def _render_frame(phase, path=None):
+    """
+    Draw one frame; save it to path as PNG, or return its raw RGBA bytes.
+    """
+    q, _ = _robot.inverse_kinematics_batch(_feet_fn(_robot, np.array([phase % 1.0])))
+    _scene.update(q[0], f"Phase: {phase % 1.0:.2f}")
+    if path is not None:
+        # savefig renders the figure itself
+        _scene.fig.savefig(path, dpi=_scene.fig.dpi)
+        return None
+    canvas = _scene.fig.canvas
+    canvas.draw()
+    return bytes(canvas.buffer_rgba())
+
+
+def frame_size(dpi=DPI):
+    return int(FIGSIZE[0] * dpi), int(FIGSIZE[1] * dpi)
+
+
+def export(out, gait='trot', start=0.0, cycles=1.0, fps=FPS, period=None, workers=None, dpi=DPI,
+           floating_base=False):
+    """
+    Render phases start .. start+cycles of a gait offscreen and write them in order.
+    Args:
+        out: .mp4 / .gif file (needs ffmpeg on PATH) or a directory for PNG frames
+        gait: key of simulate.GAITS
+        start, cycles: phase range, in gait cycles
+        fps: output frame rate, frames are spaced so playback runs in real time
+        period: gait cycle period (s), defaults to the gait's own
+        workers: process count, defaults to os.cpu_count()
+        dpi: render resolution
+        floating_base: move the body with the stance feet instead of pinning it
+
+    Returns:
+        number of frames written
+    """
+    period = GAITS[gait][1] if period is None else period
+    n_frames = int(round(cycles * period * fps))
+    phases = start + np.arange(n_frames) / (period * fps)
+    workers = workers or os.cpu_count() or 1
+
+    png_dir = None
+    ffmpeg = None
+    if os.path.splitext(out)[1].lower() in ('.mp4', '.gif'):
+        if shutil.which('ffmpeg') is None:
+            raise RuntimeError("ffmpeg not found on PATH, needed for MP4/GIF export (or export a PNG directory)")
+        w, h = frame_size(dpi)
+        ffmpeg = subprocess.Popen(
+            ['ffmpeg', '-y', '-loglevel', 'error', '-f', 'rawvideo', '-pix_fmt', 'rgba',
+             '-s', f'{w}x{h}', '-r', str(fps), '-i', '-']
+            + (['-pix_fmt', 'yuv420p'] if out.lower().endswith('.mp4') else [])
+            + [out],
+            stdin=subprocess.PIPE)
+    else:
+        png_dir = out
+        os.makedirs(png_dir, exist_ok=True)
+
+    # bounded window of in-flight frames keeps memory flat and output ordered
+    max_inflight = 2 * workers
+    pending = deque()
+
+    def write(future):
+        frame = future.result()
+        if ffmpeg is not None:
+            ffmpeg.stdin.write(frame)
+
+    with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(gait, dpi, floating_base)) as pool:
+        for k, phase in enumerate(phases):
+            path = os.path.join(png_dir, f"frame_{k:05d}.png") if png_dir else None
+            pending.append(pool.submit(_render_frame, phase, path))
+            if len(pending) >= max_inflight:
+                write(pending.popleft())
+        while pending:
+            write(pending.popleft())
+
+    if ffmpeg is not None:
+        ffmpeg.stdin.close()
+        if ffmpeg.wait() != 0:
+            raise RuntimeError(f"ffmpeg failed writing {out}")
+    return n_frames
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Parallel offscreen export of gait animations")
+    parser.add_argument("--out", required=True, help=".mp4, .gif or a directory for PNG frames")
+    parser.add_argument("--gait", choices=sorted(GAITS), default="trot")
+    parser.add_argument("--start", type=float, default=0.0, help="start phase (cycles)")
+    parser.add_argument("--cycles", type=float, default=1.0, help="number of gait cycles to render")
+    parser.add_argument("--fps", type=int, default=FPS)
+    parser.add_argument("--period", type=float, default=None, help="gait cycle period (s)")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--dpi", type=int, default=DPI)
+    parser.add_argument("--floating-base", action="store_true", help="move the body with the stance feet")
+    args = parser.parse_args(argv)
+
+    t0 = time.perf_counter()
+    n = export(args.out, args.gait, args.start, args.cycles, args.fps, args.period, args.workers, args.dpi,
+               args.floating_base)
+    elapsed = time.perf_counter() - t0
+    print(f"{n} frames -> {args.out} in {elapsed:.1f} s ({n / elapsed:.1f} frames/s)")
+
+
+if __name__ == "__main__":
+    main()
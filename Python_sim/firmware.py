@@ -0,0 +1,218 @@
+# @file
+#  @Vu H
+
+"""
+Host-side emulator of the firmware's oscillator gaits.
+Reproduces Quad._execute / Oscillator.refresh from Micropython/quad.py and
+oscillator.py: every servo follows round(A*sin(phase + phase0) + O) around
+its _stand_pose angle and the angle is written through Servo.write.
+oscillate samples it on the Oscillator refresh clock, frame_table the way
+Quad compiles a gait into a cached table over one period, and play_table
+how Quad._execute plays that table on the same clock. A whole run for all
+8 servos is one NumPy evaluation. The gait parameters are read from
+Micropython/gaits.json, the file quad.py loads on the robot; only
+omni_walk is code, as it is in quad.py.
+
+usage:
+  python firmware.py --gait forward --steps 3
+  python firmware.py --gait trot_walk --t 600 --out trot_walk.npy
+  python firmware.py --gait forward --oscillator   # Oscillator.refresh sampling
+"""
+
+import argparse
+import json
+import math
+import os
+import numpy as np
+
+# servo order of Quad.init / oscillator arrays
+SERVO_NAMES = ('FRH', 'FLH', 'FRL', 'FLL', 'BRH', 'BLH', 'BRL', 'BLL')
+STAND_POSE = (140, 40, 155, 25, 40, 140, 25, 140)  # Quad._stand_pose
+
+TS = 30  # ms, Oscillator._TS sampling period used for the phase increment
+# refresh() samples once ticks_ms() has moved *more* than TS since the last sample
+SAMPLE_MS = TS + 1
+FRAME_LIMIT = 256  # Quad FRAME_LIMIT, most frames compiled per gait period
+
+
+def servo_write(degrees):
+    """
+    Angle Servo.write actually commands: wrapped to [0, 360), anything above 180 becomes 180.
+    """
+    degrees = np.mod(degrees, 360)
+    return np.where(degrees > 180, 180, degrees)
+
+
+def servo_duty(degrees):
+    """
+    10-bit PWM duty Servo.write sets for an angle, and the angle that duty stands for.
+    """
+    duty = np.floor(servo_write(degrees) * 102 / 180 + 26).astype(int)
+    return duty, (duty - 26) * 180 / 102
+
+
+def oscillate(amplitude, offset, period, phase, steps=1.0, stand_pose=STAND_POSE, trim=0, rev=False,
+              phase_start=0.0, sample_ms=SAMPLE_MS, ts=TS):
+    """
+    Servo angles written during Quad._execute(amplitude, offset, period, phase, steps).
+    Args:
+        amplitude, offset: (8,) degrees, as passed to _execute
+        period: (8,) ms; the run lasts steps * period[0] like oscillateServos
+        phase: (8,) degrees
+        steps: gait cycles, fractional allowed
+        stand_pose: (8,) stand angles, offsets are taken around them
+        trim: scalar or (8,) servo trims (deg)
+        rev: scalar or (8,) Oscillator reverse flags
+        phase_start: Oscillator._phase at the start (rad), 0 after attach / Reset
+        sample_ms: real time between refresh samples
+        ts: Oscillator._TS used for the phase increment
+
+    Returns:
+        t: (K,) sample times (s) from the start of the run
+        angles: (K, 8) angles written to the servos (deg)
+    """
+    amplitude = np.asarray(amplitude, dtype=float)
+    period = np.asarray(period, dtype=float)
+    phase0 = np.radians(np.asarray(phase, dtype=float))
+    center = np.asarray(offset, dtype=float) + np.asarray(stand_pose, dtype=float) - 90
+
+    n_samples = int(np.floor(steps * period[0] / sample_ms)) + 1
+    k = np.arange(n_samples)[:, None]
+    # _phase advances by 2 pi / (T / TS) on every sample, for every servo alike
+    osc_phase = phase_start + k * (2 * np.pi / (period / ts))
+    return k[:, 0] * sample_ms / 1000, _refresh(amplitude, center, osc_phase + phase0, trim, rev)
+
+
+def _refresh(amplitude, center, angle, trim, rev):
+    # Oscillator.refresh: rounded position around the center, then Servo.write
+    pos = np.round(amplitude * np.sin(angle) + center)
+    pos = np.where(rev, -pos, pos)
+    return servo_write(pos + 90 + np.asarray(trim))
+
+
+def cycle_angles(amplitude, offset, period, phase, phases, stand_pose=STAND_POSE, trim=0, rev=False):
+    """
+    Servo angles at arbitrary points of the gait cycle, as refresh would write them there.
+    Args:
+        phases: (N,) fractions of period[0]
+
+    Returns:
+        angles: (N, 8) servo angles (deg)
+    """
+    period = np.asarray(period, dtype=float)
+    center = np.asarray(offset, dtype=float) + np.asarray(stand_pose, dtype=float) - 90
+    angle = 2 * np.pi * np.asarray(phases, dtype=float)[:, None] * period[0] / period
+    return _refresh(np.asarray(amplitude, dtype=float), center, angle + np.radians(np.asarray(phase, dtype=float)),
+                    trim, rev)
+
+
+def frame_table(amplitude, offset, period, phase, stand_pose=STAND_POSE, trim=0, rev=False, tick_ms=TS,
+                frame_limit=FRAME_LIMIT):
+    """
+    Frame table Quad._compileGait builds: one period, frames gcd(period, tick_ms)
+    ms apart (at most frame_limit of them), angles as refresh writes them, trims included.
+    Returns:
+        frames: (n, 8) uint8 servo angles (deg)
+    """
+    t = int(period[0])
+    n = min(t // math.gcd(t, tick_ms), frame_limit)
+    center = np.asarray(offset, dtype=float) + np.asarray(stand_pose, dtype=float) - 90
+    ms = np.arange(n)[:, None] * t / n
+    angle = 2 * np.pi * ms / np.asarray(period, dtype=float) + np.radians(np.asarray(phase, dtype=float))
+    return _refresh(np.asarray(amplitude, dtype=float), center, angle, trim, rev).astype(np.uint8)
+
+
+def play_table(frames, period_ms, steps=1.0, pos_ms=0, sample_ms=SAMPLE_MS, tick_ms=TS):
+    """
+    Angles GaitTable.play_oscillator writes over steps periods, starting at
+    cycle position pos_ms; the run ends at (pos_ms + K * tick_ms) % period_ms.
+    Returns:
+        t: (K,) sample times (s)
+        angles: (K, 8) servo angles (deg)
+    """
+    k = np.arange(int(np.floor(steps * period_ms / sample_ms)) + 1)
+    pos = (pos_ms + k * tick_ms) % period_ms
+    return k * sample_ms / 1000, frames[pos * len(frames) // period_ms].astype(float)
+
+
+# firmware gait parameter sets, (amplitude, offset, period, phase), read from the file the robot runs
+GAIT_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'Micropython', 'gaits.json')
+
+
+def omni_walk(t=1000, side=True, turn_factor=2):
+    # quad.py keeps omni_walk in code, its phases depend on side / turn_factor
+    x_amp, z_amp, ap, hi = 15, 15, 0, 23
+    front_x = 6 * (1 - pow(turn_factor, 2))
+    amplitude = [x_amp, x_amp, z_amp, z_amp, x_amp, x_amp, z_amp, z_amp]
+    offset = [ap - front_x, -ap + front_x, -hi, hi, -ap - front_x, ap + front_x, hi, -hi]
+    phase1 = np.array([0, 0, 90, 90, 180, 180, 90, 90])
+    if side:
+        phase2 = np.array([0, 180, 90, 90, 180, 0, 90, 90])
+        phase = phase1 * (1 - turn_factor) + phase2 * turn_factor
+    else:
+        phase2 = np.array([180, 0, 90, 90, 0, 180, 90, 90])
+        phase = phase1 * (1 - turn_factor) + phase2 * turn_factor
+    return amplitude, offset, [t] * 8, list(phase)
+
+
+def _gait_params(gait):
+    def params(t=gait['t']):
+        # Quad.run_gait: t replaces every servo's period
+        return list(gait['amplitude']), list(gait['offset']), [t] * 8, list(gait['phase'])
+    return params
+
+
+def load_gaits(path=GAIT_FILE):
+    """
+    Gait definitions of Micropython/gaits.json, as quad.load_gaits reads them.
+    Returns:
+        dict gait name -> (parameter function t -> (amplitude, offset, period, phase), default steps)
+    """
+    with open(path) as f:
+        data = json.load(f)
+    return {name: (_gait_params(gait), gait['steps']) for name, gait in data.items()}
+
+
+# gait name -> (parameter function, default steps), defaults as in quad.py
+FIRMWARE_GAITS = load_gaits()
+FIRMWARE_GAITS['omni_walk'] = (omni_walk, 2)
+
+
+def run_gait(name, steps=None, t=None, trim=0, oscillator=False, **kwargs):
+    """
+    Emulate Quad.<name>(steps, t), played from its compiled frame table.
+    Args:
+        oscillator: sample the Oscillator refresh clock instead, as oscillateServos does
+        **kwargs: passed to frame_table / oscillate (stand_pose, rev, ...)
+
+    Returns:
+        t: (K,) sample times (s)
+        angles: (K, 8) servo angles (deg) in SERVO_NAMES order
+    """
+    params_fn, default_steps = FIRMWARE_GAITS[name]
+    params = params_fn() if t is None else params_fn(t)
+    steps = default_steps if steps is None else steps
+    if oscillator:
+        return oscillate(*params, steps, trim=trim, **kwargs)
+    return play_table(frame_table(*params, trim=trim, **kwargs), int(params[2][0]), steps)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Emulate a firmware oscillator gait")
+    parser.add_argument("--gait", choices=sorted(FIRMWARE_GAITS), default="forward")
+    parser.add_argument("--steps", type=float, default=None, help="gait cycles, defaults as in quad.py")
+    parser.add_argument("--t", type=int, default=None, help="period (ms), defaults as in quad.py")
+    parser.add_argument("--oscillator", action="store_true", help="Oscillator refresh clock instead of the frame table")
+    parser.add_argument("--out", default=None, help="save the (K, 8) servo angles as .npy")
+    args = parser.parse_args(argv)
+
+    t, angles = run_gait(args.gait, args.steps, args.t, oscillator=args.oscillator)
+    if args.out:
+        np.save(args.out, angles)
+    print(f"{args.gait}: {len(t)} samples over {t[-1]:.2f} s")
+    for name, column in zip(SERVO_NAMES, angles.T):
+        print(f"  {name}  {column.min():5.0f} .. {column.max():5.0f} deg")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+# @file
+#  @Vu H
+
+"""
+Gait compiler: simulator gaits to servo frame tables for the ESP32.
+A gait is sampled once per firmware tick, solved with IK, mapped to servo
+angles in firmware pin order (servo_map) and quantized to whole degrees,
+one uint8 per servo. Frames whose angles fall outside what a servo can
+take are rejected rather than clipped, and so are frames the 2-DOF legs
+cannot reach within REACH_TOL, unless explicitly allowed. The table is written as a small binary file that
+Micropython/gait_table.py loads into one buffer and plays back with no
+trigonometry and no per-tick allocation.
+
+File layout (little endian): magic b'QGAT', version u8, servos u8,
+tick_ms u16, frames u32, then frames * servos angle bytes, frame-major.
+Angles exclude trims, the player adds them like Oscillator does.
+
+usage:
+  python gait_compiler.py --gait trot --out trot.qgt
+  python gait_compiler.py --gait six_step --tick 20 --out six_step.qgt
+  python gait_compiler.py --gait trot --allow-unreachable   # closest poses IK finds
+"""
+
+import argparse
+import struct
+import warnings
+import numpy as np
+
+from firmware import TS
+
+MAGIC = b'QGAT'
+VERSION = 1
+HEADER = struct.Struct('<4sBBHI')
+
+
+def quantize(angles):
+    """
+    (K, 8) servo angles (deg) to whole degrees, as uint8.
+    Raises ValueError with the frame indices if any angle rounds outside 0..180.
+    """
+    angles = np.round(angles)
+    outside = np.flatnonzero(((angles < 0) | (angles > 180)).any(axis=1))
+    if outside.size:
+        raise ValueError(f"frames {outside.tolist()} need servo angles outside 0..180 deg")
+    return angles.astype(np.uint8)
+
+
+def compile_gait(gait, tick_ms=TS, cycles=1, period=None, robot=None, servo_map=None, allow_unreachable=False):
+    """
+    Frame table of a simulated gait.
+    Args:
+        gait: key of simulate.GAITS
+        tick_ms: time between frames (ms)
+        cycles: gait cycles in the table
+        period: gait cycle period (s), defaults to the gait's own
+        robot: QuadrupedRobot, defaults to one of servo_map.FIRMWARE_MODEL
+        servo_map: servo_map.ServoMap, its trims are left out of the table
+        allow_unreachable: compile frames out of reach with the closest pose
+            IK finds, with a warning, instead of raising ValueError
+
+    Returns:
+        frames: (K, 8) uint8 servo angles (deg) in firmware servo order
+
+    Raises ValueError for frames placed more than REACH_TOL off their targets
+    and for angles a servo cannot take.
+    """
+    from kinematics import REACH_TOL, QuadrupedRobot
+    from servo_map import DEFAULT_SERVO_MAP, FIRMWARE_MODEL, ServoMap
+    from simulate import GAITS
+
+    robot = QuadrupedRobot(FIRMWARE_MODEL) if robot is None else robot
+    servo_map = DEFAULT_SERVO_MAP if servo_map is None else servo_map
+    feet_fn, gait_period = GAITS[gait]
+    period = gait_period if period is None else period
+
+    n = max(int(round(cycles * period * 1000 / tick_ms)), 1)
+    t = np.arange(n) * tick_ms / 1000
+    targets = feet_fn(robot, (t / period) % 1.0)
+    q, _ = robot.inverse_kinematics_batch(targets)
+    error = np.linalg.norm(robot.forward_kinematics(q)[:, :, 2] - robot.leg_bases - targets, axis=-1).max(axis=1)
+    missed = np.flatnonzero(error > REACH_TOL)
+    if missed.size:
+        message = (f"{gait}: {missed.size} of {n} frames out of reach (worst {error.max() * 1000:.1f} mm), "
+                   f"frames {missed[:10].tolist()}{' ...' if missed.size > 10 else ''}")
+        if not allow_unreachable:
+            raise ValueError(message)
+        warnings.warn(message, stacklevel=2)
+    try:
+        return quantize(ServoMap(servo_map.sign, servo_map.zero).to_servos(q))
+    except ValueError as e:
+        raise ValueError(f"{gait}: {e}") from None
+
+
+def pack_table(frames, tick_ms=TS):
+    """
+    Binary frame table of (K, servos) uint8 angles.
+    """
+    frames = np.ascontiguousarray(frames, dtype=np.uint8)
+    return HEADER.pack(MAGIC, VERSION, frames.shape[1], tick_ms, len(frames)) + frames.tobytes()
+
+
+def unpack_table(data):
+    """
+    Inverse of pack_table.
+    Returns:
+        frames: (K, servos) uint8 angles
+        tick_ms: time between frames (ms)
+    """
+    magic, version, servos, tick_ms, n = HEADER.unpack_from(data)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError("not a version %d gait table" % VERSION)
+    frames = np.frombuffer(data, dtype=np.uint8, count=n * servos, offset=HEADER.size)
+    return frames.reshape(n, servos), tick_ms
+
+
+def write_table(path, frames, tick_ms=TS):
+    with open(path, 'wb') as f:
+        f.write(pack_table(frames, tick_ms))
+
+
+def read_table(path):
+    with open(path, 'rb') as f:
+        return unpack_table(f.read())
+
+
+def main(argv=None):
+    from simulate import GAITS
+
+    parser = argparse.ArgumentParser(description="Compile a gait to a servo frame table")
+    parser.add_argument("--gait", choices=sorted(GAITS), default="trot")
+    parser.add_argument("--tick", type=int, default=TS, help="time between frames (ms)")
+    parser.add_argument("--cycles", type=int, default=1, help="gait cycles in the table")
+    parser.add_argument("--period", type=float, default=None, help="gait cycle period (s)")
+    parser.add_argument("--out", default=None, help="table file, defaults to <gait>.qgt")
+    parser.add_argument("--allow-unreachable", action="store_true",
+                        help="compile frames out of reach with the closest pose instead of failing")
+    args = parser.parse_args(argv)
+
+    try:
+        frames = compile_gait(args.gait, args.tick, args.cycles, args.period,
+                              allow_unreachable=args.allow_unreachable)
+    except ValueError as e:
+        parser.error(str(e))
+    out = args.out or f"{args.gait}.qgt"
+    write_table(out, frames, args.tick)
+    print(f"{args.gait}: {len(frames)} frames every {args.tick} ms, "
+          f"{HEADER.size + frames.nbytes} bytes -> {out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,421 @@
+# @file
+#  @Roboticstoolbox,RV3 from PeterCorke
+#  @Vu H
+
+"""
+Headless kinematics core: robot geometry, IK/FK and the six-step gait.
+No plotting or roboticstoolbox imports at load time, so batch jobs and
+worker processes can import it cheaply.
+"""
+
+import numpy as np
+from dataclasses import dataclass
+from functools import cached_property
+from math import pi
+
+# Robot dimensions
+BODY_SIZE = 0.07  #body
+THIGH_LENGTH = 0.037  # 3.7 cm (a1)
+LEG_LENGTH = 0.052  # 5.2 cm (a2)
+REACH_TOL = 1e-3  # max foot placement error (m) for a target to count as reachable
+
+# Six-step (A-F) walking gait used by get_joint_config
+GAIT_STEP_HEIGHT = 0.04
+GAIT_STEP_LENGTH = 0.03
+SIX_STEP_PERIOD = 1.25  # s per cycle, visualize_quadruped steps 0.04 of phase every ~0.05 s
+
+
+def _frozen(a):
+    a.setflags(write=False)
+    return a
+
+
+@dataclass(frozen=True)
+class RobotModel:
+    """
+    Immutable robot geometry. Derived arrays are computed once on first
+    access and are read-only, so one model can be shared by any number of
+    robots, worker processes and cache keys.
+    """
+    body_size: float = BODY_SIZE
+    thigh_length: float = THIGH_LENGTH  # a1
+    leg_length: float = LEG_LENGTH  # a2
+    body_height: float = 0.10  # leg base height above the ground
+    stance_x: float = 0.03  # default foot offset from its leg base, mirrored per leg
+    stance_y: float = 0.03
+    stance_z: float = -0.10
+    mass: float = 0.30  # kg, body, electronics, battery and 8 servos
+    hip_limits: tuple = (-pi, pi)  # qlim (rad)
+    knee_limits: tuple = (-pi, pi)
+
+    leg_names = ('FL', 'FR', 'BL', 'BR')
+    # (x, y) mirror signs per leg in leg_names order
+    leg_signs = ((1, 1), (1, -1), (-1, 1), (-1, -1))
+
+    @cached_property
+    def leg_bases(self):
+        """
+        (4, 3) leg base positions on the body.
+        """
+        half = self.body_size / 2
+        return _frozen(np.array([[sx * half, sy * half, self.body_height] for sx, sy in self.leg_signs]))
+
+    @cached_property
+    def base_transforms(self):
+        """
+        (4, 4, 4) homogeneous base transforms of the legs.
+        """
+        T = np.tile(np.eye(4), (len(self.leg_names), 1, 1))
+        T[:, :3, 3] = self.leg_bases
+        return _frozen(T)
+
+    @cached_property
+    def default_stance(self):
+        """
+        (4, 3) standing foot positions in leg frame.
+        """
+        return _frozen(np.array([[sx * self.stance_x, sy * self.stance_y, self.stance_z]
+                                 for sx, sy in self.leg_signs]))
+
+    @cached_property
+    def reach_envelope(self):
+        """
+        Bounds of the foot workspace in leg frame: (r_min, r_max, z_min, z_max),
+        r being the horizontal distance from the leg base.
+        """
+        a1, a2 = self.thigh_length, self.leg_length
+        return max(a1 - a2, 0.0), a1 + a2, -a2, a2
+
+
+DEFAULT_MODEL = RobotModel()
+
+
+def leg_ik(x, y, z, a1, a2):
+    """
+    2-DOF leg IK that broadcasts over targets and link lengths alike,
+    so many leg geometries can be solved in one call.
+    Args:
+        x, y, z: Endpoint coordinates in leg frame
+        a1, a2: Thigh and leg lengths
+
+    Returns:
+        t1, t2: Hip and knee joint angles (radians)
+        err: Distance (m) between the target and the foot the angles actually reach
+    """
+    #  t1 = atan2(y, x)
+    t1 = np.arctan2(y, x)
+    #  t2 = atan2(z, sqrt(x² + y²) - a1)
+    r = np.sqrt(x**2 + y**2)
+    t2 = np.arctan2(z, r - a1)
+    # knee points at the target but the foot always ends a2 from the hip
+    err = np.abs(np.hypot(r - a1, z) - a2)
+    return t1, t2, err
+
+
+def leg_fk(t1, t2, a1, a2):
+    """
+    Foot offset from the leg base, broadcasting over angles and link lengths.
+    Returns:
+        foot: (..., 3) foot positions in leg frame
+    """
+    # The knee angle t2 is relative to the horizontal plane
+    reach = a1 + a2 * np.cos(t2)
+    x, y, z = np.broadcast_arrays(reach * np.cos(t1), reach * np.sin(t1), a2 * np.sin(t2))
+    return np.stack([x, y, z], axis=-1)
+
+
+def leg_jacobian(t1, t2, a1, a2):
+    """
+    Foot velocity Jacobian d(foot)/d(t1, t2) of leg_fk, broadcasting like it.
+    Returns:
+        J: (..., 3, 2) columns are the hip and knee directions
+    """
+    c1, s1 = np.cos(t1), np.sin(t1)
+    c2, s2 = np.cos(t2), np.sin(t2)
+    reach = a1 + a2 * c2
+    zero = np.zeros_like(reach * c1)
+    hip = np.broadcast_arrays(-reach * s1, reach * c1, zero)
+    knee = np.broadcast_arrays(-a2 * s2 * c1, -a2 * s2 * s1, a2 * c2 + zero)
+    return np.stack([np.stack(hip, axis=-1), np.stack(knee, axis=-1)], axis=-1)
+
+
+class QuadrupedRobot:
+    def __init__(self, model=None):
+        # geometry, DEFAULT_MODEL is the BODY_SIZE / THIGH_LENGTH / LEG_LENGTH robot
+        self.model = DEFAULT_MODEL if model is None else model
+        self.a1 = self.model.thigh_length
+        self.a2 = self.model.leg_length
+        self.body_size = self.model.body_size
+
+        # 4 separate 2-DOF leg robots, built on first access of self.legs
+        self._legs = None
+        self.leg_names = list(self.model.leg_names)
+
+        # (4, 3) arrays in leg_names order for the batched paths, shared read-only with the model
+        self.leg_bases = self.model.leg_bases
+        self.default_stance = self.model.default_stance
+
+        # Leg base positions on body and default standing position per leg endpoint (symmetric)
+        self.leg_positions = dict(zip(self.leg_names, self.leg_bases))
+        self.default_foot_positions = dict(zip(self.leg_names, self.default_stance))
+
+    @property
+    def legs(self):
+        """
+        roboticstoolbox DHRobot per leg, only built when first needed.
+        """
+        if self._legs is None:
+            self._legs = {name: self.create_leg(name) for name in self.leg_names}
+        return self._legs
+
+    def create_leg(self, name):
+        """
+        Create a 2-DOF leg w DH parameters.
+        """
+        from roboticstoolbox import DHLink, DHRobot
+
+        # Hip - revolute, rotates in XY plane
+        l1 = DHLink(d=0, a=self.a1, alpha=0, offset=0, qlim=list(self.model.hip_limits))
+
+        # Knee- revolute, rotates to extend leg downward
+        l2 = DHLink(d=0, a=self.a2, alpha=0, offset=0, qlim=list(self.model.knee_limits))
+        leg = DHRobot([l1, l2], name=f'Leg_{name}')
+        leg.base = self.model.base_transforms[self.leg_names.index(name)].copy()
+        return leg
+
+    def forward_kinematics(self, q, bases=None):
+        """
+        Vectorized forward kinematics for all four legs over a joint trajectory.
+        Args:
+            q: (N, 8) joint angles [FL_hip, FL_knee, FR_hip, FR_knee, ...]
+            bases: (4, 3) leg base positions on body, defaults to leg_bases
+
+        Returns:
+            positions: (N, 4, 3, 3) array of [base, hip, foot] positions per leg
+        """
+        bases = self.leg_bases if bases is None else np.asarray(bases, dtype=float)
+        q = np.asarray(q, dtype=float).reshape(-1, len(bases), 2)
+        t1 = q[..., 0]
+        t2 = q[..., 1]
+        c1, s1 = np.cos(t1), np.sin(t1)
+        # The knee angle t2 is relative to the horizontal plane
+        reach = self.a1 + self.a2 * np.cos(t2)
+
+        positions = np.empty(q.shape[:2] + (3, 3))
+        positions[:, :, 0] = bases
+        # Hip joint position (end of thigh)
+        positions[:, :, 1, 0] = bases[:, 0] + self.a1 * c1
+        positions[:, :, 1, 1] = bases[:, 1] + self.a1 * s1
+        positions[:, :, 1, 2] = bases[:, 2]
+        # Foot position (end of leg)
+        positions[:, :, 2, 0] = bases[:, 0] + reach * c1
+        positions[:, :, 2, 1] = bases[:, 1] + reach * s1
+        positions[:, :, 2, 2] = bases[:, 2] + self.a2 * np.sin(t2)
+        return positions
+
+    def foward_kinematic(self, t1, t2, base_pos):
+        """
+        Calculate positions of joints and foot given joint angles.
+        Args:
+            t1: Hip joint angle
+            t2: Knee joint angle
+            base_pos: Base position of the leg (on body)
+
+        Returns:
+            positions: Array of [base, hip, foot] positions
+        """
+        return self.forward_kinematics([t1, t2], [base_pos])[0, 0]
+
+    def leg_inverse_kinematics(self, x, y, z):
+        """
+        Vectorized 2-DOF leg IK, broadcasts over any array shape.
+        Args:
+            x, y, z: Endpoint coordinates in leg frame (scalars or arrays)
+
+        Returns:
+            t1: Hip joint angle(s) (radians)
+            t2: Knee joint angle(s) (radians)
+            err: Distance (m) between the target and the foot the angles actually reach
+        """
+        return leg_ik(x, y, z, self.a1, self.a2)
+
+    def inverse_kinematics_batch(self, feet, tol=REACH_TOL, out=None):
+        """
+        Inverse kinematics for all four legs over N samples in one pass.
+        Args:
+            feet: (N, 4, 3) foot targets in leg frame, legs in leg_names order
+            tol: max placement error (m) for a leg to count as reachable
+            out: optional preallocated C-contiguous (N, 8) buffer for q
+
+        Returns:
+            q: (N, 8) joint angles [FL_hip, FL_knee, FR_hip, FR_knee, ...]
+            reachable: (N,) bool mask, True where all four feet are reachable
+        """
+        feet = np.asarray(feet, dtype=float)
+        n = feet.shape[0]
+        t1, t2, err = self.leg_inverse_kinematics(feet[..., 0], feet[..., 1], feet[..., 2])
+        q = np.empty((n, 8)) if out is None else out
+        q_legs = q.reshape(n, 4, 2)
+        q_legs[..., 0] = t1
+        q_legs[..., 1] = t2
+        reachable = np.all(err <= tol, axis=1)
+        return q, reachable
+
+    def inverse_kinematics(self, x, y, z):
+        """
+        Calculate joint angles using inverse kinematics.
+        Args:
+            x, y, z: Endpoint coordinates in leg frame
+
+        Returns:
+            t1: Hip joint angle (radians)
+            t2: Knee joint angle (radians)
+        """
+        t1, t2, _ = self.leg_inverse_kinematics(x, y, z)
+        return t1, t2
+
+    def get_joint_config(self, phase):
+        """
+        Get joint configuration for all legs at given gait phase.
+
+        Returns:
+            q: 8x1 array of joint angles [FL_hip, FL_knee, FR_hip, FR_knee, ...]
+        """
+        step_height = GAIT_STEP_HEIGHT
+        step_length = GAIT_STEP_LENGTH
+
+        # Determine which step (A-F)
+        step = int(phase * 6) % 6
+        sub_phase = (phase * 6) % 1
+
+        # Default foot positions (standing) - symmetric positions
+        foot_positions = {}
+        for name in self.leg_names:
+            foot_positions[name] = self.default_foot_positions[name].copy()
+
+        # Apply gait pattern
+        if step == 0:  # Step A - all on ground
+            pass
+
+        elif step == 1:  # Step B - lift FR and BL
+            foot_positions['FR'][2] += step_height * sub_phase
+            foot_positions['BL'][2] += step_height * sub_phase
+
+        elif step == 2:  # Step C - move FR and BL forward
+            foot_positions['FR'][2] += step_height
+            foot_positions['BL'][2] += step_height
+            foot_positions['FR'][0] += step_length * sub_phase
+            foot_positions['BL'][0] += step_length * sub_phase
+            foot_positions['FL'][0] -= step_length * 0.5 * sub_phase
+            foot_positions['BR'][0] -= step_length * 0.5 * sub_phase
+
+        elif step == 3:  # Step D - lower FR/BL, lift FL/BR
+            foot_positions['FR'][2] += step_height * (1 - sub_phase)
+            foot_positions['BL'][2] += step_height * (1 - sub_phase)
+            foot_positions['FR'][0] += step_length
+            foot_positions['BL'][0] += step_length
+            foot_positions['FL'][2] += step_height * sub_phase
+            foot_positions['BR'][2] += step_height * sub_phase
+            foot_positions['FL'][0] -= step_length * 0.5
+            foot_positions['BR'][0] -= step_length * 0.5
+
+        elif step == 4:  # Step E - move FL/BR forward
+            foot_positions['FL'][2] += step_height
+            foot_positions['BR'][2] += step_height
+            foot_positions['FL'][0] += step_length * sub_phase - step_length * 0.5
+            foot_positions['BR'][0] += step_length * sub_phase - step_length * 0.5
+            foot_positions['FR'][0] += step_length - step_length * 0.5 * sub_phase
+            foot_positions['BL'][0] += step_length - step_length * 0.5 * sub_phase
+
+        elif step == 5:  # Step F - lower all, return to neutral
+            foot_positions['FL'][2] += step_height * (1 - sub_phase)
+            foot_positions['BR'][2] += step_height * (1 - sub_phase)
+            # Blend back to default - symmetric positions
+            for name in foot_positions:
+                default = self.default_foot_positions[name]
+                foot_positions[name] = (1 - sub_phase) * foot_positions[name] + sub_phase * default
+
+        # Calculate joint angles for all legs
+        feet = np.array([[foot_positions[name] for name in self.leg_names]])
+        q, _ = self.inverse_kinematics_batch(feet)
+        return q[0]
+
+    def gait_foot_positions(self, phases, out=None):
+        """
+        Foot positions of the six-step gait for an array of phases.
+        Same arithmetic as get_joint_config, applied per step with masks
+        so the results match the scalar path exactly.
+        Args:
+            phases: (N,) gait phases
+            out: optional preallocated (N, 4, 3) buffer
+
+        Returns:
+            feet: (N, 4, 3) foot positions in leg frame, legs in leg_names order
+        """
+        step_height = GAIT_STEP_HEIGHT
+        step_length = GAIT_STEP_LENGTH
+        # leg index pairs in leg_names order
+        fr_bl = [1, 2]
+        fl_br = [0, 3]
+
+        phases = np.asarray(phases, dtype=float)
+        step = np.trunc(phases * 6).astype(int) % 6
+        # fmod + wrap rounds like Python's float %, np.mod can differ by an ulp
+        sub_phase = np.fmod(phases * 6, 1)
+        sub_phase[sub_phase < 0] += 1
+
+        feet = np.empty((len(phases), 4, 3)) if out is None else out
+        feet[:] = self.default_stance
+
+        # Step A - all on ground, nothing to do
+
+        # Step B - lift FR and BL
+        idx = np.flatnonzero(step == 1)[:, None]
+        s = sub_phase[idx]
+        feet[idx, fr_bl, 2] += step_height * s
+
+        # Step C - move FR and BL forward
+        idx = np.flatnonzero(step == 2)[:, None]
+        s = sub_phase[idx]
+        feet[idx, fr_bl, 2] += step_height
+        feet[idx, fr_bl, 0] += step_length * s
+        feet[idx, fl_br, 0] -= step_length * 0.5 * s
+
+        # Step D - lower FR/BL, lift FL/BR
+        idx = np.flatnonzero(step == 3)[:, None]
+        s = sub_phase[idx]
+        feet[idx, fr_bl, 2] += step_height * (1 - s)
+        feet[idx, fr_bl, 0] += step_length
+        feet[idx, fl_br, 2] += step_height * s
+        feet[idx, fl_br, 0] -= step_length * 0.5
+
+        # Step E - move FL/BR forward
+        idx = np.flatnonzero(step == 4)[:, None]
+        s = sub_phase[idx]
+        feet[idx, fl_br, 2] += step_height
+        feet[idx, fl_br, 0] += step_length * s - step_length * 0.5
+        feet[idx, fr_bl, 0] += step_length - step_length * 0.5 * s
+
+        # Step F - lower all, blend back to default
+        idx = np.flatnonzero(step == 5)
+        s = sub_phase[idx, None, None]
+        feet[idx[:, None], fl_br, 2] += step_height * (1 - s[:, :, 0])
+        feet[idx] = (1 - s) * feet[idx] + s * self.default_stance
+
+        return feet
+
+    def get_joint_config_batch(self, phases, out=None, feet=None):
+        """
+        Vectorized get_joint_config over an array of phases, allocation free
+        when both buffers are given.
+        Args:
+            phases: (N,) gait phases
+            out: optional preallocated C-contiguous (N, 8) buffer for q
+            feet: optional preallocated (N, 4, 3) buffer for the foot targets
+
+        Returns:
+            q: (N, 8) joint angles [FL_hip, FL_knee, FR_hip, FR_knee, ...]
+        """
+        feet = self.gait_foot_positions(phases, out=feet)
+        q, _ = self.inverse_kinematics_batch(feet, out=out)
+        return q
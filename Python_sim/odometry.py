@@ -0,0 +1,187 @@
+# @file
+#  @Vu H
+
+"""
+Stance-foot odometry.
+Feet on the ground do not slip, so between two frames the body moves by
+the rigid planar motion (x, y, yaw) that maps the common stance feet back
+onto where they were. The increments of a whole chunk are fitted at once
+(weighted 2D Procrustes) and integrated with cumulative sums; an Odometer
+carries the pose across chunks of arbitrarily long runs.
+
+usage:
+  python odometry.py --gait trot --cycles 20
+  python odometry.py --gait six_step --cycles 50 --dt 0.005
+  python odometry.py --gait trot --energy
+"""
+
+import argparse
+import numpy as np
+
+from body_pose import G, fit_body_pose, world_positions
+from stability import stance_mask
+
+
+def planar_increments(feet_a, feet_b, common):
+    """
+    Body motion between consecutive frames from the stance feet they share.
+    Args:
+        feet_a, feet_b: (N, L, 2) foot xy in the level body frame before / after
+        common: (N, L) feet on the ground in both frames
+
+    Returns:
+        d: (N, 2) body translation in the frame-a body axes (m)
+        dyaw: (N,) body rotation (rad), zero with fewer than two shared feet
+    """
+    w = common.astype(float)
+    count = w.sum(axis=1, keepdims=True)
+    safe = np.maximum(count, 1)
+    pa = (w[..., None] * feet_a).sum(axis=1) / safe
+    pb = (w[..., None] * feet_b).sum(axis=1) / safe
+    a = feet_a - pa[:, None]
+    b = feet_b - pb[:, None]
+    # rotation R(dyaw) taking the new foot positions onto the old ones
+    sin = (w * (b[..., 0] * a[..., 1] - b[..., 1] * a[..., 0])).sum(axis=1)
+    cos = (w * (b[..., 0] * a[..., 0] + b[..., 1] * a[..., 1])).sum(axis=1)
+    dyaw = np.where(count[:, 0] >= 2, np.arctan2(sin, cos), 0.0)
+    c, s = np.cos(dyaw), np.sin(dyaw)
+    d = pa - np.stack([c * pb[:, 0] - s * pb[:, 1], s * pb[:, 0] + c * pb[:, 1]], axis=-1)
+    # nothing on the ground in both frames, no information: the body holds still
+    d[count[:, 0] == 0] = 0.0
+    return d, dyaw
+
+
+class Odometer:
+    """
+    Dead-reckoned planar body pose, fed chunk by chunk.
+    """
+
+    def __init__(self):
+        self.x = 0.0
+        self.y = 0.0
+        self.yaw = 0.0
+        self._last = None  # (feet_xy, stance) of the last frame seen
+
+    def update(self, feet_xy, stance):
+        """
+        Args:
+            feet_xy: (N, L, 2) foot positions in the level body frame
+            stance: (N, L) feet on the ground
+
+        Returns:
+            pose: (N, 3) world [x, y, yaw] of the body at every frame
+        """
+        feet_xy = np.asarray(feet_xy, dtype=float)
+        stance = np.asarray(stance, dtype=bool)
+        if self._last is not None:
+            prev_feet = np.concatenate([self._last[0][None], feet_xy[:-1]])
+            prev_stance = np.concatenate([self._last[1][None], stance[:-1]])
+        else:
+            # first frame ever has nothing before it, its increment is zero
+            prev_feet = np.concatenate([feet_xy[:1], feet_xy[:-1]])
+            prev_stance = np.concatenate([stance[:1], stance[:-1]])
+        d, dyaw = planar_increments(prev_feet, feet_xy, prev_stance & stance)
+
+        yaw = self.yaw + np.cumsum(dyaw)
+        heading = yaw - dyaw  # each step is expressed in the axes of the frame before it
+        c, s = np.cos(heading), np.sin(heading)
+        x = self.x + np.cumsum(c * d[:, 0] - s * d[:, 1])
+        y = self.y + np.cumsum(s * d[:, 0] + c * d[:, 1])
+
+        self.x, self.y, self.yaw = x[-1], y[-1], yaw[-1]
+        self._last = (feet_xy[-1], stance[-1])
+        return np.stack([x, y, yaw], axis=-1)
+
+
+def cost_of_transport(energy, distance, mass):
+    """
+    Dimensionless cost of transport E / (m g d).
+    """
+    return energy / (mass * G * distance) if distance > 0 else np.inf
+
+
+def gait_odometry(gait='trot', cycles=10, dt=None, period=None, robot=None, energy_fn=None):
+    """
+    Dead-reckoned travel of a simulated gait, per cycle.
+    Args:
+        gait: key of simulate.GAITS
+        cycles: whole gait cycles simulated
+        dt, period: passed to simulate.iter_chunks
+        robot: QuadrupedRobot
+        energy_fn: optional (t, q) -> (N,) energy (J) spent per step, enables cost of transport
+
+    Returns:
+        dict with forward speed (m/s), per-cycle forward travel, lateral drift
+        and yaw drift (in the heading at the start of each cycle), total
+        distance and cost of transport (nan without energy_fn)
+    """
+    from kinematics import QuadrupedRobot
+    from simulate import DT, GAITS, iter_chunks
+
+    robot = QuadrupedRobot() if robot is None else robot
+    dt = DT if dt is None else dt
+    period = GAITS[gait][1] if period is None else period
+    feet_fn = GAITS[gait][0]
+    center = robot.leg_bases.mean(axis=0)
+    ground = (robot.leg_bases + robot.default_stance)[:, 2].min()
+    steps = int(round(period / dt))
+    odometer = Odometer()
+    poses = []
+    energy = 0.0
+    # one frame past the last cycle, so the last boundary pose is seen too
+    for t, q, feet, _ in iter_chunks((cycles * steps + 1) * dt, dt, gait, period, robot=robot):
+        # the gait plan says which feet are down, the joints say where they are
+        stance = stance_mask(robot.leg_bases + feet_fn(robot, (t / period) % 1.0), ground)
+        level = world_positions(feet, 0.0, *fit_body_pose(feet, center, stance)[1:], center)
+        poses.append(odometer.update(level[..., :2], stance))
+        if energy_fn is not None:
+            within = t < cycles * steps * dt - dt / 2
+            energy += float(np.sum(energy_fn(t[within], q[within])))
+    pose = np.concatenate(poses)
+
+    # pose at every cycle boundary, frame k * steps, every cycle exactly steps increments
+    ends = pose[::steps][:cycles + 1]
+    delta = np.diff(ends, axis=0)
+    c, s = np.cos(ends[:-1, 2]), np.sin(ends[:-1, 2])
+    forward = c * delta[:, 0] + s * delta[:, 1]
+    lateral = -s * delta[:, 0] + c * delta[:, 1]
+    distance = float(np.sum(np.hypot(delta[:, 0], delta[:, 1])))
+    return {
+        'forward_speed': float(forward.mean() / period) if len(forward) else 0.0,
+        'forward_per_cycle': forward,
+        'lateral_drift': lateral,
+        'yaw_drift': np.degrees(delta[:, 2]),
+        'distance': distance,
+        'cost_of_transport': cost_of_transport(energy, distance, robot.model.mass) if energy_fn else np.nan,
+    }
+
+
+def main(argv=None):
+    from simulate import DT, GAITS
+
+    parser = argparse.ArgumentParser(description="Stance-foot odometry of a gait")
+    parser.add_argument("--gait", choices=sorted(GAITS), default="trot")
+    parser.add_argument("--cycles", type=int, default=10)
+    parser.add_argument("--dt", type=float, default=DT, help="fixed time step (s)")
+    parser.add_argument("--period", type=float, default=None, help="gait cycle period (s)")
+    parser.add_argument("--energy", action="store_true", help="cost of transport from the torque model")
+    args = parser.parse_args(argv)
+
+    fn = None
+    if args.energy:
+        from kinematics import QuadrupedRobot
+        from torque import energy_fn
+        period = GAITS[args.gait][1] if args.period is None else args.period
+        fn = energy_fn(QuadrupedRobot(), GAITS[args.gait][0], period, args.dt)
+    result = gait_odometry(args.gait, args.cycles, args.dt, args.period, energy_fn=fn)
+    print(f"{args.gait}: {result['forward_speed'] * 1000:.1f} mm/s forward, "
+          f"{result['forward_per_cycle'].mean() * 1000:.2f} mm per cycle, "
+          f"lateral drift {result['lateral_drift'].mean() * 1000:+.3f} mm/cycle, "
+          f"yaw drift {result['yaw_drift'].mean():+.4f} deg/cycle, "
+          f"{result['distance']:.3f} m in {args.cycles} cycles")
+    if args.energy:
+        print(f"  cost of transport {result['cost_of_transport']:.4f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+# @file
+#  @Vu H
+
+"""
+Real-time renderer for the gait demos.
+The 3D scene (body, legs, hips, feet) is built once; every frame only
+updates the data of the moving artists and blits them. The gait phase is
+taken from the wall clock, so a slow frame is dropped instead of making
+the animation fall behind real time. With floating_base the body is not
+pinned: its height, roll and pitch follow the stance feet (body_pose).
+"""
+
+import time
+import matplotlib.pyplot as plt
+from matplotlib.animation import FuncAnimation
+from mpl_toolkits.mplot3d.art3d import Poly3DCollection
+
+from body_pose import fit_body_pose, world_positions
+
+LEG_COLORS = {'FL': 'red', 'FR': 'blue', 'BL': 'green', 'BR': 'orange'}
+WORKSPACE = [-0.15, 0.15, -0.15, 0.15, 0.0, 0.20]
+TARGET_FPS = 60
+
+
+class GaitScene:
+    """
+    Persistent artists for one robot; update(q) only moves leg/hip/foot data,
+    and the body too when floating_base is set.
+    """
+
+    def __init__(self, robot, title="Quadruped Robot", show_feet=True, animated=True, fig=None, floating_base=False):
+        self.robot = robot
+        self.floating_base = floating_base
+        self.fig = plt.figure(figsize=(12, 10)) if fig is None else fig
+        ax = self.fig.add_subplot(111, projection='3d')
+        self.ax = ax
+        ax.set_xlim(WORKSPACE[0], WORKSPACE[1])
+        ax.set_ylim(WORKSPACE[2], WORKSPACE[3])
+        ax.set_zlim(WORKSPACE[4], WORKSPACE[5])
+        ax.set_xlabel('X (m)')
+        ax.set_ylabel('Y (m)')
+        ax.set_zlabel('Z (m)')
+        ax.set_title(title)
+
+        # Body platform (body at z=0.10 so feet touch z=0, moves only with floating_base)
+        corners = robot.leg_bases[[0, 1, 3, 2, 0]]
+        self.body_line, = ax.plot(corners[:, 0], corners[:, 1], corners[:, 2], 'k-', linewidth=4, label='Body',
+                                  zorder=5, animated=animated and floating_base)
+        self.body_poly = Poly3DCollection([corners[:4]], alpha=0.3, facecolor='cyan', edgecolor='black',
+                                          animated=animated and floating_base)
+        ax.add_collection3d(self.body_poly)
+
+        self.leg_lines = []
+        self.hip_markers = []
+        self.foot_markers = []
+        for name in robot.leg_names:
+            line, = ax.plot([], [], [], color=LEG_COLORS[name], linewidth=5, alpha=0.9,
+                            label=f'Leg {name}', zorder=10, animated=animated)
+            hip, = ax.plot([], [], [], 'o', color='orange', markersize=12,
+                           markeredgecolor='black', markeredgewidth=2, zorder=11, animated=animated)
+            self.leg_lines.append(line)
+            self.hip_markers.append(hip)
+            if show_feet:
+                foot, = ax.plot([], [], [], 'o', color='black', markersize=10,
+                                markeredgecolor=LEG_COLORS[name], markeredgewidth=3, zorder=11, animated=animated)
+                self.foot_markers.append(foot)
+
+        self.label = ax.text2D(0.02, 0.95, "", transform=ax.transAxes, animated=animated)
+        ax.legend(loc='upper right')
+        ax.grid(True, alpha=0.3)
+
+        self.artists = self.leg_lines + self.hip_markers + self.foot_markers + [self.label]
+        if floating_base:
+            self.artists += [self.body_line, self.body_poly]
+
+    def update(self, q, text=""):
+        """
+        Move the leg artists to joint vector q (8,) and set the overlay text.
+        """
+        positions = self.robot.forward_kinematics(q)
+        if self.floating_base:
+            center = self.robot.leg_bases.mean(axis=0)
+            pose = fit_body_pose(positions[:, :, 2], center)
+            corners = world_positions(self.robot.leg_bases[None, [0, 1, 3, 2, 0]], *pose, center)[0]
+            positions = world_positions(positions, *pose, center)
+            self.body_line.set_data_3d(corners[:, 0], corners[:, 1], corners[:, 2])
+            self.body_poly.set_verts([corners[:4]])
+        positions = positions[0]
+        for i, line in enumerate(self.leg_lines):
+            p = positions[i]
+            line.set_data_3d(p[:, 0], p[:, 1], p[:, 2])
+            self.hip_markers[i].set_data_3d(p[1:2, 0], p[1:2, 1], p[1:2, 2])
+            if self.foot_markers:
+                self.foot_markers[i].set_data_3d(p[2:, 0], p[2:, 1], p[2:, 2])
+        self.label.set_text(text)
+        return self.artists
+
+
+class RealtimeRenderer:
+    """
+    Blitted FuncAnimation of a gait, with the phase driven by wall-clock time.
+    Args:
+        robot: QuadrupedRobot
+        joint_fn: phase -> (8,) joint vector
+        period: gait cycle period (s) of real time
+        label_fn: optional phase -> str shown in the overlay
+        target_fps: frame rate requested from the timer
+    """
+
+    def __init__(self, robot, joint_fn, period, label_fn=None, target_fps=TARGET_FPS, **scene_kwargs):
+        self.scene = GaitScene(robot, **scene_kwargs)
+        self.joint_fn = joint_fn
+        self.period = period
+        self.label_fn = label_fn
+        self.target_fps = target_fps
+        self.fps = 0.0
+        self.frames_drawn = 0
+        self.frames_dropped = 0
+        self._t0 = None
+        self._last = None
+        self._anim = None
+
+    def _frame(self, _):
+        now = time.perf_counter()
+        if self._t0 is None:
+            self._t0 = self._last = now
+        else:
+            interval = now - self._last
+            self._last = now
+            # smoothed FPS, and count the frames we skipped past to stay in real time
+            self.fps = 0.9 * self.fps + 0.1 / interval if self.fps else 1.0 / interval
+            self.frames_dropped += max(int(interval * self.target_fps + 0.5) - 1, 0)
+        self.frames_drawn += 1
+
+        phase = ((now - self._t0) / self.period) % 1.0
+        text = self.label_fn(phase) if self.label_fn else f"Phase: {phase:.2f}"
+        return self.scene.update(self.joint_fn(phase), f"{text}  |  {self.fps:5.1f} FPS")
+
+    def play(self):
+        """
+        Start the animation and block in plt.show() until the window closes.
+        """
+        self._anim = FuncAnimation(self.scene.fig, self._frame, interval=1000.0 / self.target_fps,
+                                   blit=True, cache_frame_data=False)
+        plt.show()
+        return self._anim
@@ -0,0 +1,203 @@
+# @file
+#  @Vu H
+
+"""
+Servo feasibility analysis of joint trajectories.
+Joint velocity, acceleration and jerk of (N, 8) trajectories by vectorized
+central differences, and the samples / segments where a joint would have
+to move faster than the servo can slew. A servo response model (command
+held between Oscillator updates, rate limit, first-order lag) predicts the
+angles the servos actually reach.
+
+usage:
+  python servo.py --gait trot
+  python servo.py --gait six_step --limit 400 --dt 0.005
+  python servo.py --gait trot --speeds 25 50 75 100
+"""
+
+import argparse
+import numpy as np
+
+from demo import DT
+
+SERVO_SPEED_LIMIT = 600.0  # deg/s, SG90 / MG90S no-load speed 0.1 s per 60 deg
+SERVO_TIME_CONSTANT = 0.02  # s, first-order lag of the servo position loop
+UPDATE_PERIOD = 0.030  # s, Oscillator._TS, a new position is written every 30 ms
+RESPONSE_DT = 0.001  # s, integration step of the response model
+TRACKING_TOL = 0.005  # m, foot error above which a gait no longer tracks
+
+
+def _central_diff(x, dt, periodic):
+    if periodic:
+        return (np.roll(x, -1, axis=0) - np.roll(x, 1, axis=0)) / (2 * dt)
+    return np.gradient(x, dt, axis=0, edge_order=2 if len(x) > 2 else 1)
+
+
+def joint_derivatives(q, dt, periodic=False):
+    """
+    Velocity, acceleration and jerk of a joint trajectory.
+    Args:
+        q: (N, J) joint angles (rad) sampled every dt
+        dt: sample spacing (s)
+        periodic: q is one gait cycle, the last sample wraps to the first
+
+    Returns:
+        qd, qdd, qddd: (N, J) in rad/s, rad/s², rad/s³
+    """
+    # atan2 results jump by 2 pi where a joint crosses the branch cut
+    q = np.unwrap(np.asarray(q, dtype=float), axis=0)
+    qd = _central_diff(q, dt, periodic)
+    qdd = _central_diff(qd, dt, periodic)
+    qddd = _central_diff(qdd, dt, periodic)
+    return qd, qdd, qddd
+
+
+def speed_violations(qd, limit=SERVO_SPEED_LIMIT):
+    """
+    (N, J) mask of samples where |qd| (rad/s) exceeds the servo limit (deg/s).
+    """
+    return np.abs(qd) > np.radians(limit)
+
+
+def violation_segments(mask):
+    """
+    Contiguous runs of True in a (N, J) mask.
+    Returns:
+        segments: (K, 3) int array of [joint, start, stop) sample ranges
+    """
+    mask = np.asarray(mask, dtype=bool)
+    padded = np.zeros((mask.shape[0] + 2, mask.shape[1]), dtype=np.int8)
+    padded[1:-1] = mask
+    edges = np.diff(padded, axis=0)
+    # column-major scan so each joint's starts and stops pair up in order
+    start_j, start_i = np.nonzero(edges.T == 1)
+    _, stop_i = np.nonzero(edges.T == -1)
+    return np.stack([start_j, start_i, stop_i], axis=1)
+
+
+def analyze(q, dt, limit=SERVO_SPEED_LIMIT, periodic=False):
+    """
+    Servo feasibility summary of a joint trajectory.
+    Returns:
+        dict with peak velocity (deg/s), acceleration (deg/s²) and jerk (deg/s³)
+        per joint, the fraction of samples with any joint over the limit, and
+        the violating segments as from violation_segments
+    """
+    qd, qdd, qddd = joint_derivatives(q, dt, periodic)
+    mask = speed_violations(qd, limit)
+    return {
+        'peak_velocity': np.degrees(np.abs(qd).max(axis=0)),
+        'peak_acceleration': np.degrees(np.abs(qdd).max(axis=0)),
+        'peak_jerk': np.degrees(np.abs(qddd).max(axis=0)),
+        'saturated_fraction': float(mask.any(axis=1).mean()),
+        'segments': violation_segments(mask),
+    }
+
+
+def servo_response(q_cmd, dt, speed_limit=SERVO_SPEED_LIMIT, tau=SERVO_TIME_CONSTANT,
+                   update_period=UPDATE_PERIOD, q0=None):
+    """
+    Angles the servos reach when driven with a commanded trajectory.
+    The command is held between firmware updates, then each servo follows it
+    with a first-order lag whose slew is clipped to its speed limit. Steps
+    run over time, every servo / trajectory in the trailing axes at once.
+    Args:
+        q_cmd: (N, ...) commanded angles (rad) sampled every dt, e.g. (N, 8)
+        dt: sample spacing (s)
+        speed_limit: deg/s, scalar or per servo (broadcast to q_cmd[0])
+        tau: lag time constant (s), scalar or per servo
+        update_period: command refresh period (s), None for a continuous command
+        q0: starting angles, defaults to the first command
+
+    Returns:
+        q: (N, ...) achieved angles (rad)
+    """
+    q_cmd = np.unwrap(np.asarray(q_cmd, dtype=float), axis=0)
+    if update_period:
+        # zero-order hold, each sample sees the command of the last update
+        held = (np.floor(np.arange(len(q_cmd)) * dt / update_period) * update_period / dt + 1e-9).astype(int)
+        q_cmd = q_cmd[held]
+    # exact discrete step of the lag, clipped to the rate limit
+    gain = -np.expm1(-dt / np.asarray(tau, dtype=float))
+    max_step = np.radians(speed_limit) * dt
+
+    q = np.empty_like(q_cmd)
+    q[0] = q_cmd[0] if q0 is None else q0
+    for k in range(1, len(q_cmd)):
+        q[k] = q[k - 1] + np.clip(gain * (q_cmd[k] - q[k - 1]), -max_step, max_step)
+    return q
+
+
+def speed_to_period(speed_percent):
+    """
+    Oscillator period (s) for a speed setting, as convert_speed_to_time in main_espnow.py.
+    """
+    speed_percent = max(25, min(100, speed_percent))
+    return int(2000 - speed_percent * 15) / 1000
+
+
+def tracking_error(robot, feet_fn, period, cycles=2, dt=RESPONSE_DT, **servo_kwargs):
+    """
+    Foot error of a gait run through the servo model, over its last cycle.
+    Args:
+        robot: QuadrupedRobot
+        feet_fn: (robot, phases) -> (N, 4, 3) foot targets, as simulate.GAITS
+        period: gait cycle period (s)
+        cycles: cycles simulated, the earlier ones let the start-up transient settle
+        **servo_kwargs: passed to servo_response
+
+    Returns:
+        q_cmd, q: (N, 8) commanded and achieved angles of the last cycle
+        error: (N, 4) distance (m) between the commanded and the achieved foot
+    """
+    n = int(round(period / dt))
+    t = np.arange(cycles * n) * dt
+    q_cmd, _ = robot.inverse_kinematics_batch(feet_fn(robot, (t / period) % 1.0))
+    q = servo_response(q_cmd, dt, **servo_kwargs)[-n:]
+    q_cmd = q_cmd[-n:]
+    error = np.linalg.norm(robot.forward_kinematics(q)[:, :, 2] - robot.forward_kinematics(q_cmd)[:, :, 2], axis=-1)
+    return q_cmd, q, error
+
+
+def main(argv=None):
+    from kinematics import QuadrupedRobot
+    from simulate import GAITS
+
+    parser = argparse.ArgumentParser(description="Servo speed feasibility of a gait")
+    parser.add_argument("--gait", choices=sorted(GAITS), default="trot")
+    parser.add_argument("--dt", type=float, default=DT, help="sample spacing (s)")
+    parser.add_argument("--period", type=float, default=None, help="gait cycle period (s)")
+    parser.add_argument("--limit", type=float, default=SERVO_SPEED_LIMIT, help="servo speed limit (deg/s)")
+    parser.add_argument("--tau", type=float, default=SERVO_TIME_CONSTANT, help="servo lag time constant (s)")
+    parser.add_argument("--speeds", type=float, nargs="*", default=None,
+                        help="firmware speed settings (%%) to check servo tracking at")
+    parser.add_argument("--tol", type=float, default=TRACKING_TOL, help="max foot tracking error (m)")
+    args = parser.parse_args(argv)
+
+    robot = QuadrupedRobot()
+    feet_fn, period = GAITS[args.gait]
+    if args.speeds:
+        for speed in args.speeds:
+            period = speed_to_period(speed)
+            _, _, error = tracking_error(robot, feet_fn, period, speed_limit=args.limit, tau=args.tau)
+            verdict = "tracks" if error.max() <= args.tol else "does NOT track"
+            print(f"{args.gait} @ {speed:g}% (period {period:.3f} s): foot error "
+                  f"mean {error.mean() * 1000:5.2f} mm, max {error.max() * 1000:5.2f} mm -> {verdict}")
+        return
+
+    period = period if args.period is None else args.period
+    n = int(round(period / args.dt))
+    q, _ = robot.inverse_kinematics_batch(feet_fn(robot, np.arange(n) / n))
+    result = analyze(q, period / n, args.limit, periodic=True)
+
+    print(f"{args.gait}: {n} samples over {period:g} s, limit {args.limit:g} deg/s, "
+          f"{result['saturated_fraction']:.1%} of the cycle saturated")
+    for k, name in enumerate(f"{leg}_{joint}" for leg in robot.leg_names for joint in ('hip', 'knee')):
+        print(f"  {name:8s} vel {result['peak_velocity'][k]:8.1f} deg/s  "
+              f"acc {result['peak_acceleration'][k]:10.0f} deg/s²  jerk {result['peak_jerk'][k]:12.0f} deg/s³")
+    for joint, start, stop in result['segments']:
+        print(f"  joint {joint} over limit from t={start * period / n:.3f} s to {stop * period / n:.3f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,178 @@
+# @file
+#  @Vu H
+
+"""
+Servo angle <-> joint angle mapping between the firmware and the simulator.
+The firmware writes degrees to 8 servos in pin order [FRH, FLH, FRL, FLL,
+BRH, BLH, BRL, BLL] around a 90 deg mechanical zero plus a per-servo trim;
+the simulator uses joint radians [FL_hip, FL_knee, FR_hip, FR_knee, ...].
+Each servo maps to one joint as joint = zero + sign * (angle - 90 - trim),
+so whole (N, 8) trajectories convert both ways in one pass. With the
+mapping, firmware gaits can be animated and analyzed like the simulator's.
+
+Conventions (kinematics leg frame): hip angles are about z, knee angles
+from the horizontal. The servos are mounted with 180 deg rotational
+symmetry, so diagonal knees share a sign. The zeros are calibrated so that
+Quad._stand_pose is the standing pose of FIRMWARE_MODEL: legs along the
+body diagonals, knees 65 deg down, i.e. STAND_HEIGHT under the leg bases.
+
+usage:
+  python servo_map.py --height 0.0471   # reproduces Quad._stand_pose
+  python servo_map.py --gait forward --animate
+"""
+
+import argparse
+import numpy as np
+from dataclasses import dataclass
+
+from firmware import FIRMWARE_GAITS, SAMPLE_MS, SERVO_NAMES, STAND_POSE, TS, cycle_angles
+from kinematics import LEG_LENGTH, THIGH_LENGTH, RobotModel
+
+MECHANICAL_ZERO = 90.0  # deg, Servo.write angle of the horn's zero, the firmware adds it to every position
+
+# the firmware stand holds every knee 65 deg below the horizontal
+STAND_KNEE = np.radians(65.0)
+STAND_HEIGHT = LEG_LENGTH * np.sin(STAND_KNEE)  # m, leg base height of Quad._stand_pose
+_STAND_REACH = (THIGH_LENGTH + LEG_LENGTH * np.cos(STAND_KNEE)) / np.sqrt(2)
+
+# the real robot: feet where Quad._stand_pose puts them, body resting on them
+FIRMWARE_MODEL = RobotModel(body_height=STAND_HEIGHT, stance_x=_STAND_REACH, stance_y=_STAND_REACH,
+                            stance_z=-STAND_HEIGHT)
+
+# servo k (SERVO_NAMES order) drives joint JOINT_INDEX[k] of the simulator joint vector
+JOINT_INDEX = np.array([2, 0, 3, 1, 6, 4, 7, 5])
+SERVO_INDEX = np.argsort(JOINT_INDEX)  # and joint j is driven by servo SERVO_INDEX[j]
+
+
+@dataclass(frozen=True)
+class ServoMap:
+    """
+    Immutable per-servo mapping, every field in SERVO_NAMES order.
+    """
+    sign: tuple = (1, 1, -1, 1, 1, 1, 1, -1)  # joint direction of an increasing servo angle
+    # joint angle (deg) at the mechanical zero; the hip horns sit 5 deg and BLL's
+    # 15 deg off square, which is why _stand_pose is not symmetric about 90
+    zero: tuple = (-95.0, 95.0, 0.0, 0.0, -85.0, 85.0, 0.0, -15.0)
+    trim: tuple = (0,) * 8  # deg, Quad trims the firmware adds on top of every position
+
+    def to_joints(self, angles):
+        """
+        Servo angles to joint angles.
+        Args:
+            angles: (..., 8) angles written to the servos (deg), trims included
+
+        Returns:
+            q: (..., 8) joint angles (rad) [FL_hip, FL_knee, FR_hip, FR_knee, ...]
+        """
+        angles = np.asarray(angles, dtype=float)
+        joints = np.asarray(self.zero) + np.asarray(self.sign) * (angles - MECHANICAL_ZERO - np.asarray(self.trim))
+        return np.radians(joints[..., SERVO_INDEX])
+
+    def to_servos(self, q, rounded=False):
+        """
+        Joint angles to the servo angles that reach them.
+        Args:
+            q: (..., 8) joint angles (rad)
+            rounded: round to whole degrees, as the firmware writes them
+
+        Returns:
+            angles: (..., 8) servo angles (deg) in SERVO_NAMES order, trims included
+        """
+        joints = np.degrees(np.asarray(q, dtype=float))[..., JOINT_INDEX]
+        # hips are angles about z; bring them within 180 deg of the mechanical zero
+        offset = (joints - np.asarray(self.zero) + 180.0) % 360.0 - 180.0
+        angles = np.asarray(self.sign) * offset + MECHANICAL_ZERO + np.asarray(self.trim)
+        return np.round(angles).astype(int) if rounded else angles
+
+
+DEFAULT_SERVO_MAP = ServoMap()
+
+
+def stand_pose(height, robot=None, servo_map=DEFAULT_SERVO_MAP):
+    """
+    _stand_pose for a body height. The hips point the legs along the model's
+    stance footprint; with the hip direction fixed the height alone sets how
+    far out the foot lands, and IK gives both joints.
+    Args:
+        height: leg base height above the ground (m)
+        robot: QuadrupedRobot, defaults to one of FIRMWARE_MODEL
+
+    Returns:
+        pose: (8,) whole-degree servo angles in SERVO_NAMES order, without trims
+        error: (4,) distance (m) between each stance target and the foot the pose reaches
+    """
+    from kinematics import QuadrupedRobot, leg_ik
+
+    robot = QuadrupedRobot(FIRMWARE_MODEL) if robot is None else robot
+    direction = robot.default_stance[:, :2] / np.linalg.norm(robot.default_stance[:, :2], axis=1, keepdims=True)
+    reach = robot.a1 + np.sqrt(max(robot.a2**2 - height**2, 0.0))
+    t1, t2, error = leg_ik(reach * direction[:, 0], reach * direction[:, 1], -height, robot.a1, robot.a2)
+    q = np.stack([t1, t2], axis=-1).reshape(-1)
+    untrimmed = ServoMap(servo_map.sign, servo_map.zero)
+    return untrimmed.to_servos(q, rounded=True), error
+
+
+def firmware_joint_fn(name, t=None, servo_map=DEFAULT_SERVO_MAP, **kwargs):
+    """
+    phase -> joint angles of a firmware gait, for renderer.RealtimeRenderer and batch analysis.
+    Args:
+        name: key of firmware.FIRMWARE_GAITS
+        t: gait period (ms), defaults as in quad.py
+        **kwargs: passed to firmware.cycle_angles (stand_pose, trim, rev)
+
+    Returns:
+        joint_fn: phases (scalar or (N,)) -> (8,) or (N, 8) joint angles (rad)
+        period: cycle period (s) of real time, the refresh clock included
+    """
+    params_fn = FIRMWARE_GAITS[name][0]
+    params = params_fn() if t is None else params_fn(t)
+    kwargs.setdefault('trim', servo_map.trim)
+
+    def joint_fn(phases):
+        phases = np.asarray(phases, dtype=float)
+        q = servo_map.to_joints(cycle_angles(*params, np.atleast_1d(phases), **kwargs))
+        return q[0] if phases.ndim == 0 else q
+    # _phase advances 2 pi TS / T per sample, but samples come every SAMPLE_MS
+    return joint_fn, params[2][0] * SAMPLE_MS / TS / 1000
+
+
+def main(argv=None):
+    from kinematics import QuadrupedRobot
+    from servo import analyze
+
+    parser = argparse.ArgumentParser(description="Servo <-> joint angle mapping of the firmware gaits")
+    parser.add_argument("--gait", choices=sorted(FIRMWARE_GAITS), default="forward")
+    parser.add_argument("--t", type=int, default=None, help="period (ms), defaults as in quad.py")
+    parser.add_argument("--samples", type=int, default=200, help="samples per gait cycle")
+    parser.add_argument("--height", type=float, default=None, help="derive _stand_pose for this body height (m)")
+    parser.add_argument("--animate", action="store_true", help="show the gait in real time")
+    args = parser.parse_args(argv)
+
+    robot = QuadrupedRobot(FIRMWARE_MODEL)
+    if args.height is not None:
+        pose, error = stand_pose(args.height, robot)
+        print(f"_stand_pose for {args.height * 1000:.1f} mm: {list(map(int, pose))} "
+              f"(firmware {list(STAND_POSE)}), max foot error {error.max() * 1000:.2f} mm")
+        return
+
+    joint_fn, period = firmware_joint_fn(args.gait, args.t)
+    if args.animate:
+        from renderer import RealtimeRenderer
+        RealtimeRenderer(robot, joint_fn, period, title=f"Quadruped Robot - firmware {args.gait}",
+                         floating_base=True).play()
+        return
+
+    q = joint_fn(np.arange(args.samples) / args.samples)
+    depth = robot.model.body_height - robot.forward_kinematics(q)[:, :, 2, 2]
+    result = analyze(q, period / args.samples, periodic=True)
+    print(f"firmware {args.gait}: period {period:.3f} s, feet {depth.min() * 1000:.1f} .. "
+          f"{depth.max() * 1000:.1f} mm below the leg bases, "
+          f"{result['saturated_fraction']:.1%} of the cycle over the servo speed limit")
+    for k, name in enumerate(SERVO_NAMES):
+        j = JOINT_INDEX[k]
+        print(f"  {name} -> joint {j}  {np.degrees(q[:, j]).min():7.1f} .. {np.degrees(q[:, j]).max():7.1f} deg  "
+              f"peak {result['peak_velocity'][j]:6.1f} deg/s")
+
+
+if __name__ == "__main__":
+    main()
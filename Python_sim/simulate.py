@@ -0,0 +1,128 @@
+# @file
+#  @Vu H
+
+"""
+Headless fixed-step simulation engine.
+Simulated time advances in integer steps of dt, independent of any
+rendering or wall clock, and trajectories are produced in batched chunks
+as fast as NumPy allows.
+
+usage:
+  python simulate.py --gait trot --duration 600
+  python simulate.py --gait six_step --duration 60 --out runs/six_step
+"""
+
+import argparse
+import os
+import time
+import numpy as np
+
+from demo import BEZIER_CYCLE, DT, FOOT_CYCLE, T_SEGMENTS, cycle_foot_positions
+from kinematics import SIX_STEP_PERIOD, QuadrupedRobot
+
+CHUNK_SIZE = 100_000  # time steps per batch
+
+
+def six_step_feet(robot, phases):
+    return robot.gait_foot_positions(phases)
+
+
+def trot_feet(robot, phases):
+    return cycle_foot_positions(robot, phases, FOOT_CYCLE)
+
+
+def bezier_feet(robot, phases):
+    return cycle_foot_positions(robot, phases, BEZIER_CYCLE)
+
+
+# gait name -> (foot target function, cycle period in seconds)
+GAITS = {
+    'six_step': (six_step_feet, SIX_STEP_PERIOD),
+    'trot': (trot_feet, sum(T_SEGMENTS)),
+    'bezier': (bezier_feet, sum(T_SEGMENTS)),
+}
+
+
+def iter_chunks(duration, dt=DT, gait='trot', period=None, chunk_size=CHUNK_SIZE, robot=None):
+    """
+    Run the gait for duration seconds at a fixed step, one batch at a time.
+    Args:
+        duration: simulated time (s)
+        dt: fixed time step (s)
+        gait: key of GAITS
+        period: gait cycle period (s), defaults to the gait's own
+        chunk_size: time steps per yielded batch
+        robot: QuadrupedRobot, a default one is built if None
+
+    Yields:
+        t: (N,) simulated time stamps
+        q: (N, 8) joint angles [FL_hip, FL_knee, FR_hip, FR_knee, ...]
+        feet: (N, 4, 3) foot positions in body frame from forward kinematics
+        reachable: (N,) True where every foot target was reachable
+    """
+    robot = QuadrupedRobot() if robot is None else robot
+    feet_fn, gait_period = GAITS[gait]
+    period = gait_period if period is None else period
+
+    n_steps = int(round(duration / dt))
+    for start in range(0, n_steps, chunk_size):
+        # time from the integer step index, so no drift builds up over long runs
+        t = np.arange(start, min(start + chunk_size, n_steps)) * dt
+        targets = feet_fn(robot, (t / period) % 1.0)
+        q, reachable = robot.inverse_kinematics_batch(targets)
+        feet = robot.forward_kinematics(q)[:, :, 2]
+        yield t, q, feet, reachable
+
+
+def simulate(duration, dt=DT, gait='trot', period=None, chunk_size=CHUNK_SIZE, robot=None):
+    """
+    Same as iter_chunks but returns the whole run as one dict of arrays.
+    """
+    chunks = list(iter_chunks(duration, dt, gait, period, chunk_size, robot))
+    if not chunks:
+        return {'t': np.empty(0), 'q': np.empty((0, 8)), 'feet': np.empty((0, 4, 3)), 'reachable': np.empty(0, bool)}
+    t, q, feet, reachable = (np.concatenate(parts) for parts in zip(*chunks))
+    return {'t': t, 'q': q, 'feet': feet, 'reachable': reachable}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Headless fixed-step gait simulation")
+    parser.add_argument("--gait", choices=sorted(GAITS), default="trot")
+    parser.add_argument("--duration", type=float, default=60.0, help="simulated seconds")
+    parser.add_argument("--dt", type=float, default=DT, help="fixed time step (s)")
+    parser.add_argument("--period", type=float, default=None, help="gait cycle period (s)")
+    parser.add_argument("--chunk", type=int, default=CHUNK_SIZE, help="time steps per batch")
+    parser.add_argument("--out", default=None, help="directory for t.npy, q.npy, feet.npy")
+    args = parser.parse_args(argv)
+
+    n_steps = int(round(args.duration / args.dt))
+    outputs = None
+    if args.out:
+        # chunks stream straight into .npy memmaps, the run never sits in RAM
+        os.makedirs(args.out, exist_ok=True)
+        shapes = {'t': (n_steps,), 'q': (n_steps, 8), 'feet': (n_steps, 4, 3), 'reachable': (n_steps,)}
+        outputs = {name: np.lib.format.open_memmap(os.path.join(args.out, f"{name}.npy"), mode="w+",
+                                                   dtype=bool if name == 'reachable' else float, shape=shape)
+                   for name, shape in shapes.items()}
+
+    start = time.perf_counter()
+    done = 0
+    for t, q, feet, reachable in iter_chunks(args.duration, args.dt, args.gait, args.period, args.chunk):
+        if outputs is not None:
+            rows = slice(done, done + len(t))
+            outputs['t'][rows] = t
+            outputs['q'][rows] = q
+            outputs['feet'][rows] = feet
+            outputs['reachable'][rows] = reachable
+        done += len(t)
+    elapsed = time.perf_counter() - start
+
+    if outputs is not None:
+        for arr in outputs.values():
+            arr.flush()
+    print(f"{args.gait}: {done} steps ({args.duration:g} s simulated) in {elapsed:.3f} s "
+          f"-> {4 * done / elapsed / 1e6:.2f} M leg-steps/s")
+
+
+if __name__ == "__main__":
+    main()
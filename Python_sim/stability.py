@@ -0,0 +1,112 @@
+# @file
+#  @Vu H
+
+"""
+Static stability of a gait.
+For every time step the stance feet are found by height above the ground,
+their convex hull is taken as the support polygon and the horizontal
+distance of the projected center of mass to its boundary is returned,
+positive inside and negative outside. All steps are evaluated at once.
+
+usage:
+  python stability.py --gait six_step
+  python stability.py --gait trot --samples 400
+"""
+
+import argparse
+import itertools
+import numpy as np
+
+STANCE_TOL = 0.002  # height (m) above the ground that still counts as a stance foot
+
+# ordered foot pairs (i, j), the candidate support polygon edges of 4 feet
+_PAIRS = np.array(list(itertools.permutations(range(4), 2)))
+
+
+def stance_mask(feet, ground=None, tol=STANCE_TOL):
+    """
+    (N, L) bool mask of the feet within tol of the ground.
+    Args:
+        feet: (N, L, 3) foot positions in body frame
+        ground: ground height, defaults to the lowest foot over all steps
+    """
+    z = np.asarray(feet)[..., 2]
+    ground = z.min() if ground is None else ground
+    return z - ground <= tol
+
+
+def stability_margin(feet, com=(0.0, 0.0), stance=None, ground=None, tol=STANCE_TOL):
+    """
+    Signed distance (m) of the projected COM to the support polygon, per step.
+    Args:
+        feet: (N, 4, 3) foot positions in body frame
+        com: (2,) or (N, 2) COM position in the body xy plane, defaults to the body center
+        stance: optional (N, 4) stance mask, found with stance_mask otherwise
+        ground, tol: passed to stance_mask
+
+    Returns:
+        margin: (N,) positive when the COM is inside the polygon, zero on its
+            boundary (or on the line of a two-foot stance), nan with no foot down
+    """
+    feet = np.asarray(feet, dtype=float)
+    stance = stance_mask(feet, ground, tol) if stance is None else np.asarray(stance, dtype=bool)
+    p = feet[..., :2]
+    com = np.broadcast_to(np.asarray(com, dtype=float), (len(p), 2))[:, None]
+
+    i, j = _PAIRS[:, 0], _PAIRS[:, 1]
+    a = p[:, i]                           # (N, E, 2) edge starts
+    d = p[:, j] - a                       # edge directions
+    length = np.hypot(d[..., 0], d[..., 1])
+    length = np.where(length > 0, length, np.inf)
+
+    # (i, j) is a counter-clockwise hull edge when no stance foot lies to its right
+    rel = p[:, None] - a[:, :, None]      # (N, E, 4, 2)
+    cross = d[:, :, None, 0] * rel[..., 1] - d[:, :, None, 1] * rel[..., 0]
+    others_left = (cross >= -1e-12 * length[..., None]) | ~stance[:, None]
+    edge = stance[:, i] & stance[:, j] & others_left.all(axis=-1)
+
+    # signed distance to each edge line (left positive) and distance to the edge segment
+    rc = com - a
+    side = (d[..., 0] * rc[..., 1] - d[..., 1] * rc[..., 0]) / length
+    s = np.clip((rc * d).sum(axis=-1) / length**2, 0.0, 1.0)
+    to_segment = np.linalg.norm(rc - s[..., None] * d, axis=-1)
+
+    inside = edge.any(axis=1) & np.all(~edge | (side >= 0), axis=1)
+    margin = np.where(inside,
+                      np.where(edge, side, np.inf).min(axis=1),
+                      -np.where(edge, to_segment, np.inf).min(axis=1))
+
+    # a single stance foot has no edges, the polygon is the foot itself
+    single = stance.sum(axis=1) == 1
+    if single.any():
+        foot = p[single][stance[single]]
+        margin[single] = -np.linalg.norm(com[single, 0] - foot, axis=-1)
+    margin[~stance.any(axis=1)] = np.nan
+    return margin
+
+
+def main(argv=None):
+    from kinematics import QuadrupedRobot
+    from simulate import GAITS
+
+    parser = argparse.ArgumentParser(description="Static stability margin of a gait")
+    parser.add_argument("--gait", choices=sorted(GAITS), default="six_step")
+    parser.add_argument("--samples", type=int, default=120, help="gait phases per cycle")
+    parser.add_argument("--tol", type=float, default=STANCE_TOL, help="stance height threshold (m)")
+    args = parser.parse_args(argv)
+
+    robot = QuadrupedRobot()
+    phases = np.arange(args.samples) / args.samples
+    feet = robot.leg_bases + GAITS[args.gait][0](robot, phases)
+    stance = stance_mask(feet, tol=args.tol)
+    margin = stability_margin(feet, stance=stance)
+
+    print(f"{args.gait}: min margin {np.nanmin(margin) * 1000:.2f} mm, "
+          f"{np.mean(margin < 0):.1%} of the cycle statically unstable")
+    for k in range(0, args.samples, max(args.samples // 12, 1)):
+        down = ''.join(name if stance[k, n] else '--' for n, name in enumerate(robot.leg_names))
+        print(f"  phase {phases[k]:.2f}  stance {down}  margin {margin[k] * 1000:7.2f} mm")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,294 @@
+# @file
+#  @Vu H
+
+"""
+Gait parameter sweep engine.
+Each configuration (step length/height, segment timing, blend time, leg
+phase offsets) is evaluated in a worker process with the headless
+kinematics core. Results are flushed as columnar .npz shards while the
+sweep runs, so an interrupted sweep resumes where it stopped.
+
+--feasible-only screens configs with the closed-form workspace check. On
+the default geometry it rejects every config: DEFAULT_MODEL stands its feet
+0.1 m under the leg bases, beyond the 0.052 m leg, and the 2-DOF legs (hip
+yaw, knee pitch) reach a surface, so a foot lifted straight up by
+step_height leaves it by more than REACH_TOL. It is meant for geometry
+sweeps ('model' grid entries) and gaits built for the leg, e.g.
+servo_map.FIRMWARE_MODEL stands within reach but still only passes short
+steps with no lift.
+
+usage:
+  python sweep.py --out sweeps/grid
+  python sweep.py --out sweeps/random --random 5000 --seed 1
+"""
+
+import argparse
+import glob
+import itertools
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import numpy as np
+
+from body_pose import fit_body_pose, world_positions
+from demo import DT, LEG_PHASE_OFFSETS, STEP_HEIGHT, STEP_LENGTH, T_SEGMENTS, TACC, build_foot_cycle, cycle_foot_positions
+from kinematics import DEFAULT_MODEL, REACH_TOL, QuadrupedRobot
+from odometry import Odometer
+from servo import joint_derivatives, speed_violations
+from stability import stability_margin, stance_mask
+from workspace import reachability
+
+METRICS = ('stride', 'peak_joint_velocity', 'reach_violations', 'max_reach_error', 'ground_clearance',
+           'servo_saturation', 'stability_margin', 'forward_speed')
+CONTACT_TOL = 1e-4  # foot offset (m) below which a foot counts as on the ground
+FLUSH_EVERY = 256   # results per shard
+
+DEFAULT_GRID = {
+    'step_length': [0.02, 0.04, 0.06, 0.08],
+    'step_height': [0.02, 0.03, 0.04],
+    't_segments': [tuple(T_SEGMENTS), (0.5, 0.1, 0.3, 0.1), (0.7, 0.05, 0.2, 0.05)],
+    'tacc': [0.02, TACC, 0.1],
+    'leg_phase_offsets': [dict(LEG_PHASE_OFFSETS), {"FL": 0.0, "BR": 0.5, "FR": 0.25, "BL": 0.75}],
+}
+
+# per-worker robots, one per RobotModel seen in the configs
+_robots = {}
+
+
+def grid_configs(grid=DEFAULT_GRID):
+    """
+    Cartesian product of a parameter grid, missing params take the demo defaults.
+    A 'model' entry with a list of RobotModel sweeps robot geometries as well.
+    """
+    defaults = default_config()
+    names = list(grid)
+    for values in itertools.product(*(grid[name] for name in names)):
+        yield {**defaults, **dict(zip(names, values))}
+
+
+def random_configs(n, space, seed=0):
+    """
+    n random configurations; space maps a param to (low, high) for a uniform
+    draw or to a list of choices.
+    """
+    rng = np.random.default_rng(seed)
+    defaults = default_config()
+    for _ in range(n):
+        config = dict(defaults)
+        for name, spec in space.items():
+            if isinstance(spec, tuple):
+                config[name] = float(rng.uniform(*spec))
+            else:
+                config[name] = spec[rng.integers(len(spec))]
+        yield config
+
+
+def default_config():
+    return {'step_length': STEP_LENGTH, 'step_height': STEP_HEIGHT, 't_segments': tuple(T_SEGMENTS),
+            'tacc': TACC, 'leg_phase_offsets': dict(LEG_PHASE_OFFSETS)}
+
+
+def evaluate_gait(config, robot=None, dt=DT, reject_infeasible=False):
+    """
+    Kinematic metrics for one gait configuration over one cycle.
+    With reject_infeasible, targets are first checked with workspace.reachability;
+    if any is out of reach the IK/FK metrics are skipped and left NaN, stride
+    (from the targets) and max_reach_error (exact, from the check) are still reported.
+    Returns:
+        stride: foot travel along x while on the ground, per cycle (m)
+        peak_joint_velocity: max |dq/dt| over all joints (rad/s)
+        reach_violations: (sample, leg) pairs whose IK error exceeds REACH_TOL
+        max_reach_error: worst IK placement error (m)
+        ground_clearance: lowest peak swing height above ground across legs (m)
+        servo_saturation: fraction of the cycle with a joint over SERVO_SPEED_LIMIT
+        stability_margin: worst static stability margin (m) of the floating body on
+            its planned stance feet, negative when the COM leaves the support polygon
+        forward_speed: stance-foot odometry travel along x over the cycle / period (m/s)
+    """
+    robot = QuadrupedRobot() if robot is None else robot
+    cycle = build_foot_cycle(config['step_length'], 0.0, config['step_height'],
+                             list(config['t_segments']), dt, config['tacc'])
+    n = len(cycle)
+    period = sum(config['t_segments'])
+
+    feet = cycle_foot_positions(robot, np.arange(n) / n, cycle, config['leg_phase_offsets'])
+    on_ground = cycle[:, 2] <= CONTACT_TOL
+    stride = np.ptp(cycle[on_ground, 0]) if on_ground.any() else 0.0
+
+    if reject_infeasible:
+        reachable, margin = reachability(feet, robot.model)
+        if not reachable.all():
+            return {
+                'stride': float(stride),
+                'peak_joint_velocity': np.nan,
+                'reach_violations': int(np.count_nonzero(~reachable)),
+                'max_reach_error': float(REACH_TOL - margin.min()),
+                'ground_clearance': np.nan,
+                'servo_saturation': np.nan,
+                'stability_margin': np.nan,
+                'forward_speed': np.nan,
+            }
+    t1, t2, err = robot.leg_inverse_kinematics(feet[..., 0], feet[..., 1], feet[..., 2])
+    q = np.unwrap(np.stack([t1, t2], axis=-1).reshape(n, 8), axis=0)
+
+    # central difference over the closed cycle, for both velocity metrics
+    qd = joint_derivatives(q, period / n, periodic=True)[0]
+    saturated = speed_violations(qd).any(axis=1)
+
+    # clearance from the feet the joints actually reach, not the targets
+    reached = robot.forward_kinematics(q)[:, :, 2]
+    foot_z = reached[..., 2]
+    clearance = np.min(foot_z.max(axis=0) - foot_z.min(axis=0))
+
+    # planned stance feet on the ground, the floating body carries the COM with it
+    stance = stance_mask(robot.leg_bases + feet)
+    center = robot.leg_bases.mean(axis=0)
+    pose = fit_body_pose(reached, center, stance)
+    com = world_positions(np.broadcast_to(center, (n, 3)), *pose, center)
+    margin = stability_margin(world_positions(reached, *pose, center), com[:, :2], stance)
+
+    # odometry over the closed cycle, the first frame appended again at the end
+    level = world_positions(reached, 0.0, *pose[1:], center)[..., :2]
+    travel = Odometer().update(np.concatenate([level, level[:1]]), np.concatenate([stance, stance[:1]]))[-1]
+
+    return {
+        'stride': float(stride),
+        'peak_joint_velocity': float(np.abs(qd).max()),
+        'reach_violations': int(np.count_nonzero(err > REACH_TOL)),
+        'max_reach_error': float(err.max()),
+        'ground_clearance': float(clearance),
+        'servo_saturation': float(saturated.mean()),
+        'stability_margin': float(np.nanmin(margin)) if np.isfinite(margin).any() else np.nan,
+        'forward_speed': float(travel[0] / period),
+    }
+
+
+def _evaluate(config_id, config, reject_infeasible=False):
+    model = config.get('model', DEFAULT_MODEL)
+    robot = _robots.get(model)
+    if robot is None:
+        robot = _robots[model] = QuadrupedRobot(model)
+    return config_id, evaluate_gait(config, robot, reject_infeasible=reject_infeasible)
+
+
+def _write_shard(out_dir, rows, robot_legs):
+    """
+    Save a batch of results as one columnar .npz shard.
+    """
+    columns = {
+        'config_id': np.array([r[0] for r in rows]),
+        'step_length': np.array([r[1]['step_length'] for r in rows]),
+        'step_height': np.array([r[1]['step_height'] for r in rows]),
+        't_segments': np.array([r[1]['t_segments'] for r in rows], dtype=float),
+        'tacc': np.array([r[1]['tacc'] for r in rows]),
+        'leg_phase_offsets': np.array([[r[1]['leg_phase_offsets'][name] for name in robot_legs] for r in rows]),
+    }
+    models = [r[1].get('model', DEFAULT_MODEL) for r in rows]
+    for name in ('body_size', 'thigh_length', 'leg_length'):
+        columns[name] = np.array([getattr(m, name) for m in models])
+    for metric in METRICS:
+        columns[metric] = np.array([r[2][metric] for r in rows])
+    shard = len(glob.glob(os.path.join(out_dir, 'part-*.npz')))
+    path = os.path.join(out_dir, f'part-{shard:05d}.npz')
+    tmp = path + '.tmp.npz'
+    np.savez(tmp, **columns)
+    # rename is atomic, an interrupted write never leaves a half shard behind
+    os.replace(tmp, path)
+
+
+def load_results(out_dir):
+    """
+    All shards of a sweep concatenated into one dict of columns.
+    """
+    paths = sorted(glob.glob(os.path.join(out_dir, 'part-*.npz')))
+    if not paths:
+        return {}
+    shards = [np.load(p) for p in paths]
+    return {name: np.concatenate([s[name] for s in shards]) for name in shards[0].files}
+
+
+def run_sweep(configs, out_dir, workers=None, flush_every=FLUSH_EVERY, reject_infeasible=False):
+    """
+    Evaluate configurations in a process pool, skipping ids already on disk.
+    Args:
+        configs: iterable of config dicts, the position in it is the config id
+        out_dir: directory for part-*.npz shards
+        workers: process count, defaults to os.cpu_count()
+        reject_infeasible: skip IK/FK for configs with unreachable targets (see evaluate_gait)
+
+    Returns:
+        number of configurations evaluated in this run
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    done = set(load_results(out_dir).get('config_id', np.empty(0, int)).tolist())
+    todo = ((i, c) for i, c in enumerate(configs) if i not in done)
+    legs = QuadrupedRobot().leg_names
+    workers = workers or os.cpu_count() or 1
+
+    rows = []
+    evaluated = 0
+    start = last_report = time.perf_counter()
+    try:
+        with ProcessPoolExecutor(workers) as pool:
+            # keep a bounded number of configs in flight so huge sweeps never queue up in RAM
+            pending = {}
+            while True:
+                for i, c in itertools.islice(todo, 4 * workers - len(pending)):
+                    pending[pool.submit(_evaluate, i, c, reject_infeasible)] = c
+                if not pending:
+                    break
+                future = next(as_completed(pending))
+                config = pending.pop(future)
+                config_id, metrics = future.result()
+                rows.append((config_id, config, metrics))
+                evaluated += 1
+                if len(rows) >= flush_every:
+                    _write_shard(out_dir, rows, legs)
+                    rows = []
+                now = time.perf_counter()
+                if now - last_report > 0.5:
+                    last_report = now
+                    print(f"\r{len(done) + evaluated} configs done ({evaluated / (now - start):.0f}/s)",
+                          end='', file=sys.stderr, flush=True)
+    finally:
+        # flush what finished, also when the sweep is interrupted
+        if rows:
+            _write_shard(out_dir, rows, legs)
+    print(f"\r{len(done) + evaluated} configs done", file=sys.stderr)
+    return evaluated
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Gait parameter sweep")
+    parser.add_argument("--out", required=True, help="directory for result shards")
+    parser.add_argument("--grid", default=None, help="JSON file mapping params to value lists")
+    parser.add_argument("--random", type=int, default=0, help="sample this many random configs instead of a grid")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--feasible-only", action="store_true",
+                        help="reject configs with unreachable foot targets before IK/FK "
+                             "(rejects every default config, see the module docstring)")
+    args = parser.parse_args(argv)
+
+    if args.random:
+        space = {'step_length': (0.01, 0.08), 'step_height': (0.01, 0.05), 'tacc': (0.01, 0.1),
+                 't_segments': DEFAULT_GRID['t_segments'], 'leg_phase_offsets': DEFAULT_GRID['leg_phase_offsets']}
+        configs = random_configs(args.random, space, args.seed)
+    else:
+        grid = DEFAULT_GRID
+        if args.grid:
+            with open(args.grid) as f:
+                grid = json.load(f)
+            if 't_segments' in grid:
+                grid['t_segments'] = [tuple(t) for t in grid['t_segments']]
+        configs = grid_configs(grid)
+
+    n = run_sweep(configs, args.out, args.workers, reject_infeasible=args.feasible_only)
+    results = load_results(args.out)
+    print(f"evaluated {n} configs, {len(results.get('config_id', []))} total in {args.out}")
+
+
+if __name__ == "__main__":
+    main()
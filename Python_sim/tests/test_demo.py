@@ -0,0 +1,16 @@
+import numpy as np
+
+import demo
+from kinematics import QuadrupedRobot
+
+
+def test_gait_table_follows_module_params(monkeypatch):
+    robot = QuadrupedRobot()
+    monkeypatch.setattr(demo, '_gait_table_cache', type(demo._gait_table_cache)())
+    before = demo.get_joint_config_from_cycle(robot, 0.3)
+    monkeypatch.setattr(demo, 'STEP_LENGTH', 0.02)
+    monkeypatch.setattr(demo, 'T_SEGMENTS', [0.5, 0.1, 0.3, 0.1])
+    after = demo.get_joint_config_from_cycle(robot, 0.3)
+    assert len(demo._gait_table_cache) == 2
+    assert not np.array_equal(before, after)
+    assert demo.get_gait_table(robot) is demo.get_gait_table(robot, 0.02, t_segments=[0.5, 0.1, 0.3, 0.1])
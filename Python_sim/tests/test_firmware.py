@@ -0,0 +1,147 @@
+import importlib
+import json
+import os
+import sys
+import time
+import types
+
+import numpy as np
+import pytest
+
+import firmware
+from servo_map import DEFAULT_SERVO_MAP, ServoMap
+
+FIRMWARE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+                            'Micropython')
+TRIMS = (1, -2, 3, 4, -5, 6, 7, 8)
+
+
+@pytest.fixture
+def board(monkeypatch):
+    """
+    quad.Quad on host stand-ins for utime, machine and micropython: a clock
+    that moves 0.05 ms per read and servos that record what they are written.
+    """
+    clock = [0.0]
+    writes = [[] for _ in range(8)]
+
+    def ticks_ms():
+        clock[0] += 0.05
+        return int(clock[0])
+
+    utime = types.ModuleType('utime')
+    utime.ticks_ms = ticks_ms
+    utime.ticks_add = lambda a, b: a + b
+    utime.ticks_diff = lambda a, b: a - b
+    utime.sleep = utime.sleep_ms = lambda _: None
+    machine = types.ModuleType('machine')
+    machine.Pin = lambda pin: pin
+    machine.PWM = type('PWM', (), {'__init__': lambda self, pin, freq: None,
+                                   'duty': lambda self, d: None, 'deinit': lambda self: None})
+    micropython = types.ModuleType('micropython')
+    micropython.const = lambda x: x
+    for name, module in (('utime', utime), ('machine', machine), ('micropython', micropython)):
+        monkeypatch.setitem(sys.modules, name, module)
+    monkeypatch.setattr(time, 'ticks_ms', ticks_ms, raising=False)  # oscillator.py reads the clock through time
+    monkeypatch.syspath_prepend(FIRMWARE_DIR)
+    monkeypatch.chdir(FIRMWARE_DIR)  # quad.py opens gaits.json from the working directory
+    for name in ('oscillator', 'gait_table', 'quad'):
+        monkeypatch.delitem(sys.modules, name, raising=False)
+
+    oscillator = importlib.import_module('oscillator')
+    monkeypatch.setattr(oscillator.Servo, 'write', lambda self, degrees: writes[self.pin].append(degrees))
+    quad = importlib.import_module('quad')
+    robot = quad.Quad()
+    robot.init(0, 1, 2, 3, 4, 5, 6, 7)
+    robot.setTrims(*TRIMS)
+
+    def written():
+        # what Servo.write makes of the recorded angles
+        angles = firmware.servo_write(np.array(writes).T)
+        for w in writes:
+            w.clear()
+        return angles
+
+    written()
+    yield robot, written
+    for name in ('oscillator', 'gait_table', 'quad'):
+        sys.modules.pop(name, None)
+
+
+@pytest.mark.parametrize("name, t", [('forward', 800), ('turn_L', 1000), ('push_up', 2000), ('moonwalk_L', 1313)])
+def test_frame_table_matches_quad(board, name, t):
+    robot, _ = board
+    params = firmware.FIRMWARE_GAITS[name][0](t)
+    table = robot._compileGait(*params)
+    assert table.period_ms == t
+    np.testing.assert_array_equal(np.frombuffer(table.frames, dtype=np.uint8).reshape(-1, 8),
+                                  firmware.frame_table(*params, trim=TRIMS))
+
+
+def test_playback_matches_play_table(board):
+    robot, written = board
+    pos = 0
+    for name, steps, t in [('forward', 3, 800), ('trot_walk', 2.5, 800), ('hide', 1.0, 2000), ('turn_L', 1.3, 1000)]:
+        getattr(robot, name)(steps=steps, t=t)
+        frames = firmware.frame_table(*firmware.FIRMWARE_GAITS[name][0](t), trim=TRIMS)
+        # Quad carries the cycle position over from the last move, as a fraction of the cycle
+        start = int(pos * t + 0.5) % t
+        _, expected = firmware.play_table(frames, t, steps, start)
+        np.testing.assert_array_equal(written(), expected)
+        pos = (start + len(expected) * firmware.TS) % t / t
+
+
+def test_trim_is_applied_before_the_servo_clamp(board):
+    robot, written = board
+    # hide drives FRL to 225 deg, past the clamp; the trim pulls it back to 175
+    trims = (0, 0, -50, 0, 0, 0, 0, 0)
+    robot.setTrims(*trims)
+    params = firmware.FIRMWARE_GAITS['hide'][0]()
+    robot.hide(steps=1)
+    angles = written()
+    np.testing.assert_array_equal(angles, firmware.oscillate(*params, 1, trim=trims)[1])
+    assert angles[0, 2] == 175
+
+
+def test_frame_cache_evicts_least_recently_used(board):
+    robot, _ = board
+    params = {t: firmware.FIRMWARE_GAITS['forward'][0](t) for t in (800, 900, 1000)}
+    size = {t: robot._servo_totals * robot._compileGait(*p).n_frames for t, p in params.items()}
+    robot.setFrameBudget(size[800] + size[900] + size[1000] - 1)
+    robot._gaitTable(*params[800])
+    robot._gaitTable(*params[900])
+    robot._gaitTable(*params[800])    # 900 is now the least recently used
+    robot._gaitTable(*params[1000])
+    assert [key[2][0] for key in robot._frame_lru] == [800, 1000]
+    assert robot._frame_bytes == size[800] + size[1000] == sum(len(table.frames) for table in robot._frame_cache.values())
+
+    # shrinking the budget evicts in the same order, a table over budget is played but not kept
+    robot.setFrameBudget(size[1000])
+    assert [key[2][0] for key in robot._frame_lru] == [1000]
+    robot._gaitTable(*firmware.FIRMWARE_GAITS['forward'][0](2000))
+    assert [key[2][0] for key in robot._frame_lru] == [1000] and robot._frame_bytes == size[1000]
+
+
+@pytest.mark.parametrize("name", sorted(firmware.FIRMWARE_GAITS))
+def test_gait_angles_round_trip_through_joints(name):
+    servo_map = ServoMap(trim=TRIMS)
+    params = firmware.FIRMWARE_GAITS[name][0]()
+    angles = firmware.cycle_angles(*params, np.arange(64) / 64, trim=TRIMS)
+    np.testing.assert_array_equal(servo_map.to_servos(servo_map.to_joints(angles), rounded=True), angles)
+    untrimmed = firmware.cycle_angles(*params, np.arange(64) / 64)
+    np.testing.assert_array_equal(DEFAULT_SERVO_MAP.to_servos(DEFAULT_SERVO_MAP.to_joints(untrimmed), rounded=True),
+                                  untrimmed)
+
+
+def test_gaits_come_from_the_firmware_data_file(tmp_path):
+    with open(firmware.GAIT_FILE) as f:
+        data = json.load(f)
+    data['forward']['amplitude'][0] = 7
+    path = tmp_path / 'gaits.json'
+    path.write_text(json.dumps(data))
+    params_fn, steps = firmware.load_gaits(str(path))['forward']
+    assert steps == data['forward']['steps']
+    amplitude, _, period, _ = params_fn()
+    assert amplitude[0] == 7 and period == [data['forward']['t']] * 8
+    assert params_fn(600)[2] == [600] * 8
+    assert set(firmware.FIRMWARE_GAITS) == set(data) | {'omni_walk'}
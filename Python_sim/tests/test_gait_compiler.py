@@ -0,0 +1,51 @@
+import numpy as np
+import pytest
+
+import simulate
+from gait_compiler import compile_gait, pack_table, quantize, unpack_table
+from kinematics import QuadrupedRobot
+from servo_map import DEFAULT_SERVO_MAP, FIRMWARE_MODEL
+
+HIP_SWING = np.radians(15.0)
+
+
+def hip_sweep_feet(robot, phases):
+    # every foot swung about its hip axis, on the surface the 2-DOF leg reaches
+    yaw = HIP_SWING * np.sin(2 * np.pi * np.asarray(phases))[:, None]
+    stance = robot.default_stance
+    c, s = np.cos(yaw), np.sin(yaw)
+    return np.stack([c * stance[:, 0] - s * stance[:, 1], s * stance[:, 0] + c * stance[:, 1],
+                     np.broadcast_to(stance[:, 2], (len(yaw), len(stance)))], axis=-1)
+
+
+def test_compiled_table_tracks_the_gait(monkeypatch):
+    monkeypatch.setitem(simulate.GAITS, 'hip_sweep', (hip_sweep_feet, 0.9))
+    frames, tick_ms = unpack_table(pack_table(compile_gait('hip_sweep')))
+    robot = QuadrupedRobot(FIRMWARE_MODEL)
+    q = DEFAULT_SERVO_MAP.to_joints(frames)
+    reached = robot.forward_kinematics(q)[:, :, 2] - robot.leg_bases
+    targets = hip_sweep_feet(robot, (np.arange(len(frames)) * tick_ms / 900) % 1.0)
+    # whole-degree servo angles, under half a degree per joint
+    assert np.linalg.norm(reached - targets, axis=-1).max() < 1.5e-3
+
+
+@pytest.mark.parametrize("gait", sorted(simulate.GAITS))
+def test_unreachable_gaits_are_rejected(gait):
+    # the Cartesian foot paths lift feet straight up, off the 2-DOF legs' surface
+    with pytest.raises(ValueError, match="out of reach"):
+        compile_gait(gait)
+    with pytest.warns(UserWarning, match="out of reach"):
+        frames = compile_gait(gait, allow_unreachable=True)
+    assert frames.dtype == np.uint8 and frames.shape[1] == 8
+
+
+def test_out_of_range_angles_are_rejected():
+    with pytest.raises(ValueError, match=r"frames \[1\]"):
+        quantize(np.array([[90.0] * 8, [90.0] * 7 + [181.0]]))
+
+
+def test_table_round_trip():
+    frames = np.random.default_rng(0).integers(0, 181, (40, 8)).astype(np.uint8)
+    decoded, tick_ms = unpack_table(pack_table(frames, 20))
+    assert tick_ms == 20
+    np.testing.assert_array_equal(decoded, frames)
@@ -0,0 +1,36 @@
+import numpy as np
+
+from kinematics import REACH_TOL, QuadrupedRobot
+
+
+def test_batched_gait_matches_scalar_path_exactly():
+    robot = QuadrupedRobot()
+    phases = np.concatenate([np.linspace(0.0, 1.0, 241), [1 / 6, 0.5, 5 / 6, 0.999999999]])
+    expected = np.array([robot.get_joint_config(p) for p in phases])
+    assert np.array_equal(robot.get_joint_config_batch(phases), expected)
+
+    out = np.empty((len(phases), 8))
+    feet = np.empty((len(phases), 4, 3))
+    q = robot.get_joint_config_batch(phases, out=out, feet=feet)
+    assert q is out and np.array_equal(q, expected)
+    assert np.array_equal(feet, robot.gait_foot_positions(phases))
+
+
+def test_inverse_kinematics_batch_reachability_and_out():
+    robot = QuadrupedRobot()
+    q_true = np.tile([0.3, -0.6, -0.2, -0.9, 0.5, -0.4, -0.1, -1.0], (3, 1))
+    feet = robot.forward_kinematics(q_true)[:, :, 2] - robot.leg_bases
+    # sample 1: one foot pushed off the surface by more than the tolerance, sample 2: by less
+    feet[1, 2, 2] -= 3 * REACH_TOL
+    feet[2, 0, 2] -= 0.5 * REACH_TOL
+
+    out = np.full((3, 8), np.nan)
+    q, reachable = robot.inverse_kinematics_batch(feet, out=out)
+    assert q is out
+    np.testing.assert_array_equal(reachable, [True, False, True])
+    np.testing.assert_allclose(q[0], q_true[0], atol=1e-12)
+
+    # the buffer is overwritten in full on reuse
+    q2, reachable2 = robot.inverse_kinematics_batch(feet[:1].repeat(3, axis=0), out=out)
+    assert q2 is out and reachable2.all()
+    np.testing.assert_allclose(q2, q_true, atol=1e-12)
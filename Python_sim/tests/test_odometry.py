@@ -0,0 +1,14 @@
+import numpy as np
+import pytest
+
+from odometry import gait_odometry
+from simulate import GAITS
+
+
+@pytest.mark.parametrize("dt", [0.01, 0.05])
+def test_every_cycle_travels_the_same(dt):
+    result = gait_odometry('trot', cycles=4, dt=dt)
+    forward = result['forward_per_cycle']
+    assert len(forward) == 4 and forward[0] > 0
+    np.testing.assert_allclose(forward, forward[0], rtol=1e-9)
+    assert result['forward_speed'] == pytest.approx(forward[0] / GAITS['trot'][1])
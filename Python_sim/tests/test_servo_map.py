@@ -0,0 +1,26 @@
+import numpy as np
+
+from firmware import STAND_POSE
+from servo_map import DEFAULT_SERVO_MAP, FIRMWARE_MODEL, STAND_HEIGHT, ServoMap, stand_pose
+
+
+def test_stand_pose_matches_firmware():
+    pose, error = stand_pose(STAND_HEIGHT)
+    assert list(pose) == list(STAND_POSE)
+    assert np.all(error < 1e-9)
+
+
+def test_firmware_stand_pose_is_model_stance():
+    from kinematics import QuadrupedRobot
+
+    robot = QuadrupedRobot(FIRMWARE_MODEL)
+    q = DEFAULT_SERVO_MAP.to_joints(np.array(STAND_POSE, dtype=float))
+    feet = robot.forward_kinematics(q[None])[0, :, 2] - robot.leg_bases
+    np.testing.assert_allclose(feet, robot.default_stance, atol=1e-12)
+
+
+def test_round_trip_with_trims():
+    servo_map = ServoMap(trim=(3, -2, 1, 0, 4, -5, 2, 1))
+    angles = np.random.default_rng(0).uniform(0, 180, (200, 8))
+    np.testing.assert_allclose(servo_map.to_servos(servo_map.to_joints(angles)), angles, atol=1e-9)
+    assert list(servo_map.to_servos(servo_map.to_joints(STAND_POSE), rounded=True)) == list(STAND_POSE)
@@ -0,0 +1,28 @@
+import numpy as np
+
+from kinematics import QuadrupedRobot
+from simulate import GAITS
+from torque import energy_fn, joint_torques
+
+
+def test_horizontal_reactions_load_the_hips():
+    robot = QuadrupedRobot()
+    q = np.tile([0.3, -0.8], (1, 4))
+    upward = joint_torques(q, np.ones((1, 4)), robot.a1, robot.a2)
+    sideways = joint_torques(q, np.tile([0.0, 1.0, 1.0], (1, 4, 1)), robot.a1, robot.a2)
+    np.testing.assert_allclose(upward[:, 0::2], 0.0, atol=1e-12)
+    assert np.all(np.abs(sideways[:, 0::2]) > 1e-3)
+    np.testing.assert_allclose(sideways[:, 1::2], upward[:, 1::2] + joint_torques(
+        q, np.tile([0.0, 1.0, 0.0], (1, 4, 1)), robot.a1, robot.a2)[:, 1::2])
+
+
+def test_energy_does_not_depend_on_chunking():
+    robot = QuadrupedRobot()
+    feet_fn, period = GAITS['trot']
+    dt = period / 100
+    t = np.arange(100) * dt
+    q, _ = robot.inverse_kinematics_batch(feet_fn(robot, t / period))
+    energy = energy_fn(robot, feet_fn, period, dt)
+    whole = energy(t, q)
+    chunked = np.concatenate([energy(t[:37], q[:37]), energy(t[37:], q[37:])])
+    np.testing.assert_allclose(chunked, whole)
@@ -0,0 +1,35 @@
+import numpy as np
+import pytest
+
+from trajectory import BezierFootCycle, mstraj
+
+
+@pytest.mark.parametrize("tacc", [0.05, [0.02, 0.1, 0.04]])
+def test_mstraj_matches_toolbox(tacc):
+    rtb = pytest.importorskip("roboticstoolbox")
+    via = np.array([[0.0, 0.0, 0.0], [0.03, -0.01, 0.0], [0.03, 0.0, 0.02], [-0.02, 0.01, 0.02]])
+    tsegment = [0.6, 0.2, 0.4]
+    expected = rtb.mstraj(via, dt=0.01, tacc=tacc, tsegment=tsegment).q
+    q = mstraj(via, tsegment, 0.01, tacc)
+    assert q.shape == expected.shape
+    np.testing.assert_allclose(q, expected, rtol=0, atol=1e-15)
+
+
+def test_bezier_derivatives_match_finite_differences():
+    cycle = BezierFootCycle(0.06, 0.04, 0.6, 1.0)
+    # away from the stance/swing switches, where the acceleration jumps
+    phase = np.concatenate([np.linspace(0.01, 0.59, 30), np.linspace(0.61, 0.99, 40)])
+    h = 1e-5
+    pos, vel, acc = cycle.evaluate(phase)
+    pos_a, vel_a, _ = cycle.evaluate(phase + h)
+    pos_b, vel_b, _ = cycle.evaluate(phase - h)
+    dt = 2 * h * cycle.period
+    np.testing.assert_allclose((pos_a - pos_b) / dt, vel, atol=1e-6)
+    np.testing.assert_allclose((vel_a - vel_b) / dt, acc, atol=1e-4)
+
+
+def test_bezier_velocity_is_continuous_at_lift_off_and_touch_down():
+    cycle = BezierFootCycle(0.06, 0.04, 0.6, 1.0)
+    _, before, _ = cycle.evaluate(np.array([0.6 - 1e-9, 1.0 - 1e-9]))
+    _, after, _ = cycle.evaluate(np.array([0.6, 0.0]))
+    np.testing.assert_allclose(before, after, atol=1e-6)
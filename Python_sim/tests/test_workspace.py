@@ -0,0 +1,36 @@
+import numpy as np
+
+from kinematics import DEFAULT_MODEL, REACH_TOL, QuadrupedRobot
+from sweep import default_config, evaluate_gait
+from workspace import reachability
+
+
+def test_margin_is_the_exact_placement_error():
+    robot = QuadrupedRobot()
+    reach = robot.a1 + robot.a2
+    feet = np.random.default_rng(0).uniform(-reach, reach, (2000, 3))
+    reachable, margin = reachability(feet)
+    q = np.stack([np.arctan2(feet[:, 1], feet[:, 0]),
+                  np.arctan2(feet[:, 2], np.hypot(feet[:, 0], feet[:, 1]) - robot.a1)], axis=-1)
+    reached = robot.forward_kinematics(np.tile(q, 4))[:, 0, 2] - robot.leg_bases[0]
+    np.testing.assert_allclose(REACH_TOL - margin, np.linalg.norm(reached - feet, axis=-1), atol=1e-12)
+    assert reachable.any() and not reachable.all()
+    np.testing.assert_array_equal(reachable, margin >= 0)
+
+
+def test_joint_limits_reject_reachable_targets():
+    model = type(DEFAULT_MODEL)(knee_limits=(-np.pi / 4, np.pi / 4))
+    # on the surface, knee 60 deg down
+    foot = [model.thigh_length + model.leg_length / 2, 0.0, -model.leg_length * np.sqrt(3) / 2]
+    reachable, margin = reachability([foot], model)
+    assert margin[0] > 0 and not reachable[0]
+    assert reachability([foot])[0][0]
+
+
+def test_rejected_configs_report_stride_and_error():
+    # the default stance is beyond the legs' reach
+    rejected = evaluate_gait(default_config(), reject_infeasible=True)
+    evaluated = evaluate_gait(default_config())
+    assert rejected['stride'] == evaluated['stride']
+    assert rejected['max_reach_error'] == evaluated['max_reach_error']
+    assert np.isnan(rejected['peak_joint_velocity'])
@@ -0,0 +1,120 @@
+# @file
+#  @Vu H
+
+"""
+Monte Carlo tolerance analysis.
+Builds thousands of virtual robots whose link lengths, body size, leg
+mounting, stance and servo trims scatter around the nominal values,
+drives all of them with the gait in one batched NumPy evaluation, and
+reports how far their feet land from where the nominal robot puts them.
+
+usage:
+  python tolerance.py --gait trot --robots 2000
+  python tolerance.py --trim-sd 3 --link-sd 0.001
+"""
+
+import argparse
+import numpy as np
+
+from kinematics import leg_fk, leg_ik, QuadrupedRobot
+from simulate import GAITS
+
+CONTACT_TOL = 1e-4  # target height (m) above the stance plane that still counts as on the ground
+
+# default build scatter (1 standard deviation)
+TOLERANCES = {
+    'link_sd': 0.0005,    # thigh / leg length (m), per leg
+    'body_sd': 0.0005,    # BODY_SIZE (m), per robot
+    'mount_sd': 0.0005,   # leg mounting position on the body (m), per leg and axis
+    'stance_sd': 0.001,   # default_foot_positions (m), per leg and axis
+    'trim_sd': 2.0,       # servo horn trim (deg), per joint
+}
+
+
+def monte_carlo(feet, n_robots=2000, seed=0, robot=None, **tolerances):
+    """
+    Drive n_robots perturbed builds with the same gait in one batched pass.
+    Joint commands are solved for each build's own (perturbed) stance with the
+    nominal link lengths, as the firmware would, then applied to the real
+    geometry with the servo trim added.
+    Args:
+        feet: (N, 4, 3) nominal gait foot targets in leg frame
+        n_robots: number of virtual robots
+        seed: RNG seed
+        robot: nominal QuadrupedRobot
+        **tolerances: overrides for TOLERANCES
+
+    Returns:
+        placement_error: (M, N, 4) distance (m) of each foot from the nominal robot's foot
+        stance_imbalance: (M, N) spread (m) of the stance feet's height error, nan with < 2 feet down
+    """
+    robot = QuadrupedRobot() if robot is None else robot
+    tol = {**TOLERANCES, **tolerances}
+    rng = np.random.default_rng(seed)
+    m = n_robots
+    feet = np.asarray(feet, dtype=float)
+
+    # sampled builds, all arrays broadcast as (M, N, 4)
+    a1 = robot.a1 + tol['link_sd'] * rng.standard_normal((m, 1, 4))
+    a2 = robot.a2 + tol['link_sd'] * rng.standard_normal((m, 1, 4))
+    scale = 1.0 + tol['body_sd'] / robot.body_size * rng.standard_normal((m, 1, 1))
+    bases = robot.leg_bases * np.concatenate([scale, scale, np.ones_like(scale)], axis=-1)
+    bases = bases + tol['mount_sd'] * rng.standard_normal((m, 4, 3))
+    stance_shift = tol['stance_sd'] * rng.standard_normal((m, 1, 4, 3))
+    trim = np.radians(tol['trim_sd']) * rng.standard_normal((m, 1, 4, 2))
+
+    # nominal robot reference
+    t1, t2, _ = leg_ik(feet[..., 0], feet[..., 1], feet[..., 2], robot.a1, robot.a2)
+    nominal = robot.leg_bases + leg_fk(t1, t2, robot.a1, robot.a2)
+
+    # perturbed builds: commands from nominal IK on their own stance, real geometry + trim
+    targets = feet + stance_shift
+    t1, t2, _ = leg_ik(targets[..., 0], targets[..., 1], targets[..., 2], robot.a1, robot.a2)
+    actual = bases[:, None] + leg_fk(t1 + trim[..., 0], t2 + trim[..., 1], a1, a2)
+
+    placement_error = np.linalg.norm(actual - nominal, axis=-1)
+
+    on_ground = (feet[..., 2] - robot.default_stance[:, 2]) <= CONTACT_TOL
+    # height relative to the nominal robot, so the nominal gait's own reach error does not count
+    z = actual[..., 2] - nominal[..., 2]
+    z_hi = np.where(on_ground, z, -np.inf).max(axis=-1)
+    z_lo = np.where(on_ground, z, np.inf).min(axis=-1)
+    stance_imbalance = np.where(on_ground.sum(axis=-1) >= 2, z_hi - z_lo, np.nan)
+    return placement_error, stance_imbalance
+
+
+def summarize(placement_error, stance_imbalance, percentiles=(50, 95, 99)):
+    """
+    Distribution over robots of each robot's worst foot error and stance imbalance.
+    """
+    worst_error = placement_error.max(axis=(1, 2))
+    worst_imbalance = np.nanmax(stance_imbalance, axis=1)
+    summary = {}
+    for name, values in (('placement_error', worst_error), ('stance_imbalance', worst_imbalance)):
+        summary[name] = {f'p{p}': float(np.percentile(values, p)) for p in percentiles}
+        summary[name]['max'] = float(values.max())
+    return summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Monte Carlo build tolerance analysis")
+    parser.add_argument("--gait", choices=sorted(GAITS), default="trot")
+    parser.add_argument("--robots", type=int, default=2000)
+    parser.add_argument("--samples", type=int, default=100, help="gait phases per cycle")
+    parser.add_argument("--seed", type=int, default=0)
+    for name, value in TOLERANCES.items():
+        parser.add_argument(f"--{name.replace('_', '-')}", type=float, default=value)
+    args = parser.parse_args(argv)
+
+    robot = QuadrupedRobot()
+    feet = GAITS[args.gait][0](robot, np.arange(args.samples) / args.samples)
+    tolerances = {name: getattr(args, name) for name in TOLERANCES}
+    error, imbalance = monte_carlo(feet, args.robots, args.seed, robot, **tolerances)
+
+    print(f"{args.robots} robots, gait {args.gait}, tolerances {tolerances}")
+    for name, stats in summarize(error, imbalance).items():
+        print(f"  {name:17s} " + "  ".join(f"{k} {v * 1000:6.2f} mm" for k, v in stats.items()))
+
+
+if __name__ == "__main__":
+    main()
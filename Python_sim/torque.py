@@ -0,0 +1,165 @@
+# @file
+#  @Vu H
+
+"""
+Quasi-static joint torque and energy estimation.
+The body weight is shared by the stance legs so that forces and moments
+about the COM balance (minimum-norm vertical forces), and each leg's
+ground reaction is mapped to joint torques through the leg Jacobian. The
+reactions are vertical and the hip yaw axes too, so the hips carry no
+load in this model and only knee torques are reported.
+Leg masses and inertia are neglected. Everything is vectorized over time
+and legs.
+
+usage:
+  python torque.py                  # every gait in simulate.GAITS
+  python torque.py --gait trot --samples 400
+"""
+
+import argparse
+import numpy as np
+
+from body_pose import G
+from kinematics import leg_jacobian
+from stability import stance_mask
+
+KGCM_PER_NM = 100 / G  # servo datasheets rate torque in kg·cm
+
+
+def stance_forces(feet_xy, stance, weight, com=(0.0, 0.0)):
+    """
+    Vertical ground reactions that hold the body still.
+    Minimum-norm solution of total force = weight and zero moment about the
+    COM over the stance feet; where no such solution exists (COM outside the
+    support polygon) negative forces are clipped and the rest rescaled.
+    Args:
+        feet_xy: (N, L, 2) foot positions in the body xy plane
+        stance: (N, L) feet on the ground
+        weight: body weight (N)
+        com: (2,) or (N, 2) COM in the body xy plane
+
+    Returns:
+        forces: (N, L) upward force on each foot (N)
+    """
+    feet_xy = np.asarray(feet_xy, dtype=float)
+    w = np.asarray(stance, dtype=float)
+    r = feet_xy - np.broadcast_to(np.asarray(com, dtype=float), (len(feet_xy), 2))[:, None]
+    # rows: sum f = weight, sum f*x = 0, sum f*y = 0, only stance columns count
+    A = np.stack([w, w * r[..., 0], w * r[..., 1]], axis=1)
+    b = np.array([weight, 0.0, 0.0])
+    forces = (np.linalg.pinv(A) @ b[:, None])[..., 0]
+    forces = np.clip(forces, 0.0, None) * w
+    total = forces.sum(axis=1, keepdims=True)
+    return np.where(total > 0, forces * weight / np.where(total > 0, total, 1), 0.0)
+
+
+def joint_torques(q, forces, a1, a2):
+    """
+    Servo torques that hold the foot forces.
+    Args:
+        q: (N, 8) joint angles [FL_hip, FL_knee, FR_hip, FR_knee, ...]
+        forces: (N, 4, 3) ground reaction per foot (N), or (N, 4) upward ones
+
+    Returns:
+        tau: (N, 8) joint torques (N·m), same layout as q
+
+    The hip yaw axis is vertical, so upward reactions alone load only the
+    knees; hip torques come from the horizontal force components.
+    """
+    q = np.asarray(q, dtype=float).reshape(len(q), -1, 2)
+    forces = np.asarray(forces, dtype=float)
+    if forces.ndim == 2:
+        forces = forces[..., None] * np.array([0.0, 0.0, 1.0])
+    J = leg_jacobian(q[..., 0], q[..., 1], a1, a2)
+    # the servo balances the ground pushing on the foot: tau = -J^T F
+    tau = -np.einsum('...ij,...i->...j', J, forces)
+    return tau.reshape(len(q), -1)
+
+
+def gait_torques(robot, feet_fn, period, samples=200):
+    """
+    Torques, joint velocities and reactions of one gait cycle.
+    Args:
+        robot: QuadrupedRobot
+        feet_fn: (robot, phases) -> (N, 4, 3) foot targets, as simulate.GAITS
+        period: gait cycle period (s)
+
+    Returns:
+        tau: (N, 8) joint torques (N·m)
+        qd: (N, 8) joint velocities (rad/s)
+        forces: (N, 4) ground reactions (N)
+    """
+    from servo import joint_derivatives
+
+    targets = feet_fn(robot, np.arange(samples) / samples)
+    q, _ = robot.inverse_kinematics_batch(targets)
+    tau, forces = _torques(robot, targets, q)
+    qd, _, _ = joint_derivatives(q, period / samples, periodic=True)
+    return tau, qd, forces
+
+
+def _torques(robot, targets, q):
+    # stance from the gait plan, load shared over where the feet really are
+    feet = robot.forward_kinematics(q)[:, :, 2]
+    stance = stance_mask(robot.leg_bases + targets, (robot.leg_bases + robot.default_stance)[:, 2].min())
+    forces = stance_forces(feet[..., :2], stance, robot.model.mass * G, robot.leg_bases.mean(axis=0)[:2])
+    return joint_torques(q, forces, robot.a1, robot.a2), forces
+
+
+def energy_fn(robot, feet_fn, period, dt):
+    """
+    (t, q) -> (N,) energy (J) spent per step, for odometry.gait_odometry.
+    Joint velocities are central differences over the gait cycle: the
+    neighbouring samples are solved at t -+ dt with the phase wrapped, so
+    chunk edges and the cycle wrap get no one-sided difference.
+    """
+    def joints_at(t):
+        return robot.inverse_kinematics_batch(feet_fn(robot, (t / period) % 1.0))[0]
+
+    def energy(t, q):
+        tau, _ = _torques(robot, feet_fn(robot, (t / period) % 1.0), q)
+        # atan2 results jump by 2 pi across the branch cut
+        step = (joints_at(t + dt) - joints_at(t - dt) + np.pi) % (2 * np.pi) - np.pi
+        qd = step / (2 * dt)
+        return np.abs(tau * qd).sum(axis=1) * dt
+    return energy
+
+
+def torque_summary(tau, qd, dt):
+    """
+    Peak and RMS torque per joint, and the energy spent over the samples.
+    Hobby servos do not regenerate, so negative work costs energy as well.
+    Returns:
+        dict with peak_torque, rms_torque (8,) in N·m and energy (J)
+    """
+    return {
+        'peak_torque': np.abs(tau).max(axis=0),
+        'rms_torque': np.sqrt(np.mean(tau**2, axis=0)),
+        'energy': float(np.sum(np.abs(tau * qd)) * dt),
+    }
+
+
+def main(argv=None):
+    from kinematics import QuadrupedRobot
+    from simulate import GAITS
+
+    parser = argparse.ArgumentParser(description="Quasi-static joint torque and energy per gait")
+    parser.add_argument("--gait", choices=sorted(GAITS), default=None, help="defaults to every gait")
+    parser.add_argument("--samples", type=int, default=200, help="samples per gait cycle")
+    args = parser.parse_args(argv)
+
+    robot = QuadrupedRobot()
+    names = robot.leg_names
+    for gait in [args.gait] if args.gait else sorted(GAITS):
+        feet_fn, period = GAITS[gait]
+        tau, qd, _ = gait_torques(robot, feet_fn, period, args.samples)
+        summary = torque_summary(tau, qd, period / args.samples)
+        print(f"{gait}: {summary['energy']:.3f} J per {period:g} s cycle ({summary['energy'] / period:.3f} W)")
+        # hips are unloaded by vertical reactions, knees are the odd joints
+        for k, leg in enumerate(names):
+            print(f"  {leg}_knee  peak {summary['peak_torque'][2 * k + 1] * KGCM_PER_NM:5.2f} kg·cm  "
+                  f"rms {summary['rms_torque'][2 * k + 1] * KGCM_PER_NM:5.2f} kg·cm")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,176 @@
+# @file
+#  @Roboticstoolbox,RV3 from PeterCorke
+#  @Vu H
+
+"""
+Dependency-light multi-segment trajectories (NumPy only).
+mstraj follows roboticstoolbox.mstraj step for step, so foot cycles can
+be built without importing the toolbox. BezierFootCycle is a continuous
+alternative evaluated in closed form.
+"""
+
+import math
+import numpy as np
+
+
+def _mrange(start, stop, step):
+    """
+    MATLAB style start:step:stop, includes the final value.
+    """
+    istart = round(start / step)
+    istop = round(stop / step)
+    return np.arange(istart, istop + 1) * step
+
+
+def _blend(q0, qf, qd0, qd1, t):
+    """
+    Quintic blend from q0 to qf over the time vector t (same as jtraj).
+    Args:
+        q0, qf: (n,) start and end coordinates
+        qd0, qd1: (n,) start and end velocities
+        t: (K,) time stamps starting at 0
+
+    Returns:
+        q: (K, n) blended coordinates
+    """
+    tscal = t[-1]
+    ts = (t / tscal)[:, None]
+    A = 6 * (qf - q0) - 3 * (qd1 + qd0) * tscal
+    B = -15 * (qf - q0) + (8 * qd0 + 7 * qd1) * tscal
+    C = 10 * (qf - q0) - (6 * qd0 + 4 * qd1) * tscal
+    E = qd0 * tscal
+    return ((((A * ts + B) * ts + C) * ts) * ts + E) * ts + q0
+
+
+def mstraj(viapoints, tsegment, dt, tacc):
+    """
+    Multi-segment multi-axis trajectory with polynomial blends at the via points.
+    Drop-in for roboticstoolbox.mstraj(viapoints, tsegment=..., dt=..., tacc=...).q
+    Args:
+        viapoints: (M+1, n) start point followed by M via points, one per row
+        tsegment: (M,) time of each segment (s)
+        dt: time step (s)
+        tacc: blend time (s), scalar or one per segment
+
+    Returns:
+        q: (K, n) trajectory sampled every dt
+    """
+    viapoints = np.asarray(viapoints, dtype=float)
+    q0 = viapoints[0]
+    viapoints = viapoints[1:]
+    ns, nj = viapoints.shape
+    if len(tsegment) != ns:
+        raise ValueError("tsegment must have one time per segment")
+    taccs = np.broadcast_to(np.asarray(tacc, dtype=float), (ns,))
+
+    q_prev = q0
+    qd_prev = np.zeros(nj)
+    parts = []
+    for seg in range(ns):
+        q_next = viapoints[seg]
+
+        # blend time, just half an interval for the first segment
+        tacc = math.ceil(taccs[seg] / dt) * dt
+        tacc2 = math.ceil(tacc / 2 / dt) * dt
+        taccx = tacc2 if seg == 0 else tacc
+
+        tseg = tsegment[seg]
+        qd = (q_next - q_prev) / tseg
+
+        if taccx > 0:
+            qb = _blend(q0, q_prev + tacc2 * qd, qd_prev, qd, _mrange(0, taccx, dt))
+            parts.append(qb[1:])
+
+        # linear part, from tacc/2+dt to tseg-tacc/2
+        s = (_mrange(tacc2 + dt, tseg - tacc2, dt) / tseg)[:, None]
+        if len(s):
+            linear = (1 - s) * q_prev + s * q_next
+            parts.append(linear)
+            q0 = linear[-1]
+
+        q_prev = q_next
+        qd_prev = qd
+
+    # final blend down to rest
+    if tacc2 > 0:
+        qb = _blend(q0, q_next, qd_prev, np.zeros(nj), _mrange(0, tacc2, dt))
+        parts.append(qb[1:])
+
+    return np.vstack(parts)
+
+
+def _bernstein(n, s):
+    """
+    Bernstein basis of degree n at parameters s, shape (len(s), n + 1).
+    """
+    k = np.arange(n + 1)
+    coeff = np.array([math.comb(n, i) for i in k], dtype=float)
+    s = s[:, None]
+    return coeff * s**k * (1 - s)**(n - k)
+
+
+class BezierFootCycle:
+    """
+    Continuous foot cycle: linear stance on the ground, Bezier swing in the air.
+    Positions, velocities and accelerations are closed form in phase, and
+    velocity is continuous at lift-off and touch-down.
+    Same convention as FOOT_CYCLE rows: offsets (dx, dy, dz) from the neutral
+    foot, stance starts at phase 0 at x = +step_length/2 and moves backwards.
+    """
+
+    def __init__(self, step_length, step_height, stance_fraction, period):
+        self.step_length = step_length
+        self.step_height = step_height
+        self.stance_fraction = stance_fraction
+        self.period = period
+
+        half = step_length / 2.0
+        t_stance = stance_fraction * period
+        t_swing = (1 - stance_fraction) * period
+        n = 6
+        # end tangents carry the stance velocity into and out of the swing
+        lead = step_length / t_stance * t_swing / n
+        # middle points raised so the curve peaks at step_height (B2+B3+B4 at s=0.5 is 50/64)
+        z_mid = step_height * 64.0 / 50.0
+        self.control_points = np.array([
+            [-half, 0.0, 0.0],
+            [-half - lead, 0.0, 0.0],
+            [-half, 0.0, z_mid],
+            [0.0, 0.0, z_mid],
+            [half, 0.0, z_mid],
+            [half + lead, 0.0, 0.0],
+            [half, 0.0, 0.0],
+        ])
+
+    def evaluate(self, phase):
+        """
+        Foot offset and its time derivatives at an array of cycle phases.
+        Args:
+            phase: (N,) cycle phases (wraps at 1.0)
+
+        Returns:
+            pos: (N, 3) foot offsets (m)
+            vel: (N, 3) foot velocities (m/s)
+            acc: (N, 3) foot accelerations (m/s^2)
+        """
+        u = np.asarray(phase, dtype=float) % 1.0
+        beta = self.stance_fraction
+        pos = np.zeros(u.shape + (3,))
+        vel = np.zeros(u.shape + (3,))
+        acc = np.zeros(u.shape + (3,))
+
+        # stance - constant speed backwards on the ground
+        stance = u < beta
+        pos[stance, 0] = self.step_length / 2.0 - self.step_length * u[stance] / beta
+        vel[stance, 0] = -self.step_length / (beta * self.period)
+
+        # swing - Bezier curve and its derivatives, rescaled from s to seconds
+        swing = ~stance
+        s = (u[swing] - beta) / (1 - beta)
+        t_swing = (1 - beta) * self.period
+        P = self.control_points
+        n = len(P) - 1
+        pos[swing] = _bernstein(n, s) @ P
+        vel[swing] = n * (_bernstein(n - 1, s) @ np.diff(P, axis=0)) / t_swing
+        acc[swing] = n * (n - 1) * (_bernstein(n - 2, s) @ np.diff(P, 2, axis=0)) / t_swing**2
+        return pos, vel, acc
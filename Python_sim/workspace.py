@@ -0,0 +1,61 @@
+# @file
+#  @Vu H
+
+"""
+Leg workspace check.
+The 2-DOF leg reaches the torus swept by a circle of radius a2 around the
+knee axis, so the placement error of a foot target has a closed form
+(kinematics.leg_ik): |hypot(r - a1, z) - a2|, r being the horizontal
+distance from the leg base. A target is reachable when that error is
+within tol and the joint angles IK gives are within the model's limits.
+Everything is one vectorized pass over the targets, no IK/FK round trip.
+
+usage:
+  python workspace.py                 # time a batch of random queries
+  python workspace.py --points 100000
+"""
+
+import argparse
+import time
+import numpy as np
+
+from kinematics import DEFAULT_MODEL, REACH_TOL, leg_ik
+
+
+def _limit_margin(angle, limits):
+    return np.minimum(angle - limits[0], limits[1] - angle)
+
+
+def reachability(feet, model=DEFAULT_MODEL, tol=REACH_TOL):
+    """
+    Reachability of a batch of foot targets.
+    Args:
+        feet: (..., 3) foot targets in leg frame
+        model: RobotModel, for the link lengths and joint limits
+        tol: max placement error (m) for a target to count as reachable
+
+    Returns:
+        reachable: (...) bool, placement error within tol and joints within their limits
+        margin: (...) tol minus the placement error (m), negative when out of reach
+    """
+    feet = np.asarray(feet, dtype=float)
+    t1, t2, err = leg_ik(feet[..., 0], feet[..., 1], feet[..., 2], model.thigh_length, model.leg_length)
+    margin = tol - err
+    joints_ok = (_limit_margin(t1, model.hip_limits) >= 0) & (_limit_margin(t2, model.knee_limits) >= 0)
+    return (margin >= 0) & joints_ok, margin
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the leg workspace check")
+    parser.add_argument("--points", type=int, default=1_000_000)
+    args = parser.parse_args(argv)
+
+    a = DEFAULT_MODEL.thigh_length + DEFAULT_MODEL.leg_length
+    feet = np.random.default_rng(0).uniform(-a, a, (args.points, 3))
+    t = time.perf_counter()
+    reachable, _ = reachability(feet)
+    print(f"{args.points} queries in {time.perf_counter() - t:.3f} s ({reachable.mean():.1%} reachable)")
+
+
+if __name__ == "__main__":
+    main()